@@ -546,8 +546,6 @@ class Apartments(EnvEPlusFMU):
 
     Methods
     --------
-    step(inputs):
-        Advances the simulation one timestep.
     predict_ev(steps):
         Provides a forecast for the EV schedule.
     """
@@ -566,6 +564,10 @@ class Apartments(EnvEPlusFMU):
         generate_forecasts=True,
         generate_forecast_method="perfect",
         generate_forecast_keys=None,
+        fast_reset=True,
+        history_window=None,
+        log_level="full",
+        generate_forecast_seed=None,
     ):
         """
         Parameters
@@ -587,6 +589,17 @@ class Apartments(EnvEPlusFMU):
             "ESP_CT_Barcelona"
         kpi_options : dict, optional
             Dict to specify the tracked KPIs, by default None.
+        fast_reset : bool, optional
+            Whether reset() restores the FMU state captured after initialization,
+            when supported by the FMU, by default True
+        history_window : int, optional
+            Number of steps kept in the output history, by default None, i.e.
+            the whole simulation
+        log_level : str, optional
+            Messages of the FMU that are logged, 'off', 'errors' or 'full',
+            by default 'full'
+        generate_forecast_seed : int or np.random.Generator, optional
+            Seed of the 'stochastic' forecasts, by default None
         """
 
         n_steps = 20
@@ -613,30 +626,22 @@ class Apartments(EnvEPlusFMU):
             generate_forecasts,
             generate_forecast_method,
             generate_forecast_keys,
+            fast_reset,
+            history_window,
+            log_level,
+            generate_forecast_seed,
         )
 
-    def step(self, inputs):
-        """Advances the simulation one timestep.
-
-        Calls the step() method of EnvFMU.
-
-        Parameters
-        ----------
-        inputs : dict
-            Inputs for the system. Keys are input names, values are iterables of input values.
-            If not defined, assumes no inputs required.
+    def _get_exogenous_inputs(self):
+        """Returns the inputs set from the EV availability schedule.
 
         Returns
         -------
-        out : dict
-            Outputs for the system.
+        dict
+            Input values for the current timestep, keyed by input name.
         """
-        minute, hour, day, month = self.get_date()
-        date = datetime.datetime(2019, month, day, hour, minute)
-        ev_val = self.EV_schedule.get(date)
-        inputs["Bd_DisCh_EVBat_sp"] = [ev_val]
-        out = super().step(inputs=inputs)
-        return out
+        date = self.get_datetime()
+        return {"Bd_DisCh_EVBat_sp": self.EV_schedule.get(date)}
 
     def predict_ev(self, steps):
         """Provides a forecast for the EV schedule.
@@ -651,16 +656,15 @@ class Apartments(EnvEPlusFMU):
         predictions : list
             List of predicted values.
         """
-        minute, hour, day, month = self.get_date()
-        date = datetime.datetime(2019, month, day, hour, minute)
+        date = self.get_datetime()
         predictions = []
         for _ in range(steps):
             predictions.append(self.EV_schedule.predict(date))
             date = date + datetime.timedelta(minutes=3)
         return {"Bd_DisCh_EVBat": predictions}
 
-    def get_forecast(self, forecast_length=24, **kwargs):
-        forecasts = super().get_forecast(forecast_length, **kwargs)
+    def get_forecast(self, forecast_length=24, n_members=None, **kwargs):
+        forecasts = super().get_forecast(forecast_length, n_members, **kwargs)
         predictions = self.predict_ev(steps=forecast_length)
         forecasts = {**forecasts, **predictions}
         return forecasts
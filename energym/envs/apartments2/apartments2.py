@@ -524,8 +524,6 @@ class Apartments2(EnvEPlusFMU):
 
     Methods
     --------
-    step(inputs):
-        Advances the simulation one timestep.
     predict_ev(steps):
         Provides a forecast for the EV schedule.
     """
@@ -545,6 +543,10 @@ class Apartments2(EnvEPlusFMU):
         generate_forecasts=True,
         generate_forecast_method="perfect",
         generate_forecast_keys=None,
+        fast_reset=True,
+        history_window=None,
+        log_level="full",
+        generate_forecast_seed=None,
     ):
         """
         Parameters
@@ -566,6 +568,17 @@ class Apartments2(EnvEPlusFMU):
             "ESP_CT_Barcelona"
         kpi_options : dict, optional
             Dict to specify the tracked KPIs, by default None.
+        fast_reset : bool, optional
+            Whether reset() restores the FMU state captured after initialization,
+            when supported by the FMU, by default True
+        history_window : int, optional
+            Number of steps kept in the output history, by default None, i.e.
+            the whole simulation
+        log_level : str, optional
+            Messages of the FMU that are logged, 'off', 'errors' or 'full',
+            by default 'full'
+        generate_forecast_seed : int or np.random.Generator, optional
+            Seed of the 'stochastic' forecasts, by default None
         """
 
         n_steps = 20
@@ -593,32 +606,25 @@ class Apartments2(EnvEPlusFMU):
             generate_forecasts,
             generate_forecast_method,
             generate_forecast_keys,
+            fast_reset,
+            history_window,
+            log_level,
+            generate_forecast_seed,
         )
 
-    def step(self, inputs):
-        """Advances the simulation one timestep.
-
-        Calls the step() method of EnvFMU.
-
-        Parameters
-        ----------
-        inputs : dict
-            Inputs for the system. Keys are input names, values are iterables of input values.
-            If not defined, assumes no inputs required.
+    def _get_exogenous_inputs(self):
+        """Returns the inputs set from the EV availability schedules.
 
         Returns
         -------
-        out : dict
-            Outputs for the system.
+        dict
+            Input values for the current timestep, keyed by input name.
         """
-        minute, hour, day, month = self.get_date()
-        date = datetime.datetime(2019, month, day, hour, minute)
-        ev1_val = self.EV1_schedule.get(date)
-        ev2_val = self.EV2_schedule.get(date)
-        inputs["Bd_DisCh_EV1Bat_sp"] = [ev1_val]
-        inputs["Bd_DisCh_EV1Bat_sp"] = [ev2_val]
-        out = super().step(inputs=inputs)
-        return out
+        date = self.get_datetime()
+        return {
+            "Bd_DisCh_EV1Bat_sp": self.EV1_schedule.get(date),
+            "Bd_DisCh_EV2Bat_sp": self.EV2_schedule.get(date),
+        }
 
     def predict_ev(self, steps):
         """Provides a forecast for the EV schedule.
@@ -633,8 +639,7 @@ class Apartments2(EnvEPlusFMU):
         predictions : list
             List of predicted values.
         """
-        minute, hour, day, month = self.get_date()
-        date = datetime.datetime(2019, month, day, hour, minute)
+        date = self.get_datetime()
         predictions = {"Bd_DisCh_EV1Bat": [], "Bd_DisCh_EV2Bat": []}
         for _ in range(steps):
             predictions["Bd_DisCh_EV1Bat"].append(
@@ -646,8 +651,8 @@ class Apartments2(EnvEPlusFMU):
             date = date + datetime.timedelta(minutes=3)
         return predictions
 
-    def get_forecast(self, forecast_length=24, **kwargs):
-        forecasts = super().get_forecast(forecast_length, **kwargs)
+    def get_forecast(self, forecast_length=24, n_members=None, **kwargs):
+        forecasts = super().get_forecast(forecast_length, n_members, **kwargs)
         print(forecasts)
         predictions = self.predict_ev(steps=forecast_length)
         forecasts = {**forecasts, **predictions}
@@ -1,6 +1,8 @@
 import logging
 import os
 import abc
+import asyncio
+import functools
 from pathlib import Path
 from os.path import expanduser
 
@@ -37,6 +39,10 @@ class Env:
         Gets the forecasts for external parameters.
     get_output()
         Gets the outputs of the last simulation step.
+    astep(inputs, executor=None)
+        Runs step() on an executor, awaitable from asyncio.
+    areset(executor=None, **kwargs)
+        Runs reset() on an executor, awaitable from asyncio.
 
     """
 
@@ -47,7 +53,7 @@ class Env:
         self.runs_path = os.path.join(home, "Energym_runs")
         if not os.path.isdir(self.runs_path):
             try:
-                os.mkdir(self.runs_path)
+                os.makedirs(self.runs_path, exist_ok=True)
             except BaseException as e:
                 logger.exception(f"Unable to create folder 'Energym_runs'. {e}")
 
@@ -114,6 +120,48 @@ class Env:
         """
         pass
 
+    async def astep(self, inputs, executor=None):
+        """Advances the simulation by one timestep without blocking the event loop.
+
+        Runs step() on an executor, so that the simulation of several
+        environments, e.g. gathered with asyncio.gather(), overlaps with
+        other coroutines. Calls on the same environment must not overlap.
+
+        Parameters
+        ----------
+        inputs : dict
+            Inputs passed to step()
+        executor : concurrent.futures.Executor, optional
+            Executor running step(), by default the default executor of the
+            event loop
+
+        Returns
+        -------
+        The return value of step().
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.step, inputs)
+
+    async def areset(self, executor=None, **kwargs):
+        """Resets the simulation environment without blocking the event loop.
+
+        Parameters
+        ----------
+        executor : concurrent.futures.Executor, optional
+            Executor running reset(), by default the default executor of the
+            event loop
+        **kwargs
+            Arguments passed to reset()
+
+        Returns
+        -------
+        The return value of reset().
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor, functools.partial(self.reset, **kwargs)
+        )
+
     @property
     def unwrapped(self):
         """Completely unwrap this env.
@@ -1,26 +1,81 @@
 import os
+import copy
+import datetime
 import math
+import pickle
 import shutil
 import time
 import collections
 from pathlib import Path
 import logging
 import uuid
+import threading
+from ctypes import POINTER, c_uint, c_double
 
 import numpy as np
-from fmpy.fmi1 import FMU1Slave, FMU1Model
-from fmpy.fmi2 import FMU2Slave, FMU2Model
-from fmpy import read_model_description, extract
+from fmpy.fmi1 import (
+    FMU1Slave,
+    FMU1Model,
+    fmi1CallbackFunctions,
+    fmi1CallbackLoggerTYPE,
+    fmi1CallbackAllocateMemoryTYPE,
+    fmi1CallbackFreeMemoryTYPE,
+)
+from fmpy.fmi2 import (
+    FMU2Slave,
+    FMU2Model,
+    fmi2FMUstate,
+    fmi2CallbackFunctions,
+    fmi2CallbackLoggerTYPE,
+    fmi2CallbackAllocateMemoryTYPE,
+    fmi2CallbackFreeMemoryTYPE,
+    allocateMemory,
+    freeMemory,
+)
+from fmpy import read_model_description
 
 from energym.envs.env import Env
 from energym.envs.utils.weather import EPW, MOS
 from energym.envs.utils.kpi import KPI
+from energym.schedules.AbstractSchedule import ScheduleAbstract
+from energym.envs.utils.me_solver import (
+    SOLVERS,
+    ModelExchangeStepper,
+    FixedStepIntegrator,
+)
+from energym.envs.utils.fmu_cache import (
+    extract_cached,
+    create_instance_dir,
+    load_model_info,
+)
 from energym.spaces.dict import Dict
 from energym.spaces.discrete import Discrete
 from energym.spaces.box import Box
 
 logger = logging.getLogger(__name__)
 
+# serializes the loading and unloading of FMU instances across threads
+_instance_lock = threading.Lock()
+# shared extractions whose binaries are loaded by a live instance
+_shared_binaries_in_use = set()
+# year of the calendar of the simulations, whose time counts the seconds since
+# its first of January. It is not a leap year and starts on a Tuesday, like
+# 2013, the year the dates were historically computed in.
+CALENDAR_YEAR = 2019
+# logging levels of the FMUs
+LOG_LEVELS = ["off", "errors", "full"]
+# number of FMU log messages kept in memory
+FMU_LOG_SIZE = 1000
+# labels and logging levels of the FMI status codes
+FMI_STATUS = [
+    ("OK", logging.DEBUG),
+    ("WARNING", logging.WARNING),
+    ("DISCARD", logging.WARNING),
+    ("ERROR", logging.ERROR),
+    ("FATAL", logging.ERROR),
+    ("PENDING", logging.DEBUG),
+]
+
 
 class EnvFMU(Env):
     """The FMU base class for Energym.
@@ -34,7 +89,10 @@ class EnvFMU(Env):
         Full path to the FMU file
     model_description : fmpy ModelDescription object
         Encapsulated description of the model extracted from the FMU using
-        FMPy inspection methods
+        FMPy inspection methods, parsed on first access
+    model_info : dict
+        Essentials of the model description, cached on disk (see
+        energym.envs.utils.fmu_cache.load_model_info)
     fmi_version : str
         Version number of FMI, inspected inside the FMU. Should be '1.0'
         or '2.0'
@@ -58,14 +116,43 @@ class EnvFMU(Env):
         Contains controllable input variables
     output_space : dict
         Contains output variables
-    observation_history : list
-        Collects all observations of one simulation
+    history_window : int
+        Number of steps kept in the output history
+    log_level : str
+        Messages of the FMU that are logged, 'off', 'errors' or 'full'
+    fmu_log : collections.deque
+        Last log messages of the FMU, as (status, message) tuples
     unzipdir : str
-        Directory for extracting the FMU
+        Per-instance directory of the FMU, linked to the shared extraction
+    instance_id : str
+        Unique identifier of the FMU instance, used for its folders
+    output_dirs : list of str
+        Folders written by the FMU instance outside of unzipdir
+    fmu_cache_path : str
+        Directory holding the FMUs extracted once per content hash
+    model_cache_path : str
+        Directory holding the cached model descriptions
     fmu : FMU1Slave or FMU2Slave or FMU1Model or FMU2Model
         Simulation object
     time : int or double
         Current simulation time (int for EnergyPlus, double for Modelica)
+    fast_reset : bool
+        Whether reset() restores the FMU state captured after initialization
+        instead of re-instantiating the FMU, when the FMU supports it
+    solver : str
+        Solver integrating model-exchange FMUs, None for co-simulation
+    max_solver_step : float
+        Largest internal step of the solver in seconds
+    hold_steps : int
+        Number of step sizes simulated by one step, with held inputs
+    dense_output : bool
+        Whether a held step samples the outputs at every step size
+    dense_outputs : np.ndarray
+        Outputs of the last step sampled at every step size, of shape
+        (hold_steps, number of outputs), None without dense output
+    calendar : dict
+        Minute, hour, day, month and weekday (0 for Monday) of every step
+        of the episode, as arrays indexed by step number
 
 
     Methods
@@ -84,8 +171,20 @@ class EnvFMU(Env):
         Retrieves list of outputs from model description.
     get_date()
         Gets the current simulation time.
+    get_datetime()
+        Gets the current simulation time as a datetime.
+    get_history(keys=None, last_n=None)
+        Gets the outputs of the last steps.
+    select_outputs(keys=None)
+        Narrows the outputs read from the FMU at every step.
     step(inputs=None)
         Advances the simulation one timestep.
+    step_array(u)
+        Advances the simulation one timestep with an input vector.
+    rollout(inputs_matrix)
+        Simulates a whole input trajectory in one call.
+    step_array_batch(envs, inputs)
+        Advances several environments one timestep with input vectors.
     print_kpis()
         Prints the KPIs.
     get_kpi(start_ind=0, end_ind=-1)
@@ -102,6 +201,22 @@ class EnvFMU(Env):
         Post-process output of FMPY.
     reset()
         Resets the simulation.
+    supports_fmu_state()
+        Checks whether the FMU can get and set its state.
+    supports_fmu_serialization()
+        Checks whether the FMU can serialize its state.
+    clone()
+        Creates an independent copy of the environment in its current state.
+    fork(n)
+        Creates n independent copies of the environment in its current state.
+    release()
+        Returns a copy made by fork() to the pool of idle instances.
+    checkpoint(path)
+        Writes the state of the simulation to a file.
+    set_checkpoints(path, every)
+        Writes a checkpoint periodically while stepping.
+    resume(path)
+        Continues the simulation from a checkpoint.
     close()
         Terminates the FMU and removes leftover folders.
 
@@ -119,6 +234,13 @@ class EnvFMU(Env):
         kpi_options=None,
         default_path=True,
         weather_file_path=None,
+        fast_reset=True,
+        solver=None,
+        max_solver_step=None,
+        hold_steps=1,
+        dense_output=False,
+        history_window=None,
+        log_level="full",
     ):
         """
         Parameters
@@ -144,39 +266,105 @@ class EnvFMU(Env):
             Dict to specify the tracked KPIs, by default None
         default_path : bool
             Whether to use the deault path or an absolute path in model_path
+        weather_file_path : str, optional
+            Path to the weather file copied into the FMU resources, by default None
+        fast_reset : bool, optional
+            If True, reset() restores the FMU state captured after
+            initialization when the FMU advertises canGetAndSetFMUstate,
+            by default True
+        solver : str, optional
+            Solver integrating model-exchange FMUs, 'euler', 'rk4' or 'cvode'.
+            If given, the model-exchange interface is used even if the FMU
+            also supports co-simulation. By default None, i.e. co-simulation
+            if available, else 'cvode'
+        max_solver_step : float, optional
+            Largest internal step of the solver in seconds, by default the
+            step size
+        hold_steps : int, optional
+            Number of step sizes simulated by one step. The inputs are held
+            and the FMU takes a single communication step of
+            hold_steps * step_size. By default 1
+        dense_output : bool, optional
+            If True, a held step is simulated in hold_steps communication
+            steps of step_size and the outputs are sampled after each of
+            them, by default False
+        history_window : int, optional
+            Number of steps kept in the output history, see get_history().
+            By default None, i.e. all the steps between start_time and
+            stop_time. 0 disables the history
+        log_level : str, optional
+            Messages of the FMU that are logged: 'off' for none, 'errors'
+            for errors only or 'full' for all of them, by default 'full'.
+            They are kept in fmu_log and sent to the logger of the module.
+            With 'off', the folders written by the FMU are removed by
+            close() instead of being moved to the runs folder
 
 
         Raises
         ------
         ValueError
-            If the FMU supprts neither co-simulation nor model exchange
+            If the FMU supprts neither co-simulation nor model exchange, or
+            if the solver is unknown, or if hold_steps is not a positive
+            integer, or if log_level is unknown
         """
         super().__init__()
         if default_path:
             self.fmu_file = self.energym_path / "simulation" / model_path
         else:
             self.fmu_file = model_path
-        self.model_description = read_model_description(self.fmu_file)
+        self.fmu_cache_path = os.path.join(self.runs_path, "fmu_cache")
+        self.model_cache_path = os.path.join(self.runs_path, "model_cache")
+        self.model_info = load_model_info(self.fmu_file, self.model_cache_path)
+        self._model_description = None
         self.step_size = step_size
         self.weather = weather
         self.weather_file_path = weather_file_path
         self.is_fmu_initialized = False
+        self.fast_reset = fast_reset
+        self._reset_state = None
+        self._reset_time = None
+        # idle instances shared by an environment and its copies
+        self._clone_pool = []
+        self._reset_state_data = None
+        self._checkpoint_path = None
+        self._checkpoint_every = None
+        self._steps_since_checkpoint = 0
 
         # Extract variables references
-        self.vrs = {}
-        for variable in self.model_description.modelVariables:
-            self.vrs[variable.name] = variable.valueReference
+        variables = self.model_info["variables"]
+        self.vrs = dict(zip(variables["names"], variables["value_references"]))
 
         # detect fmi_version
-        self.fmi_version = self.model_description.fmiVersion
+        self.fmi_version = self.model_info["fmi_version"]
 
         # detect FMI type
-        if self.model_description.coSimulation is not None:
-            self.fmi_type = "cosim"
-        elif self.model_description.modelExchange is not None:
-            self.fmi_type = "modex"
-        else:
+        self.fmi_type = self.model_info["fmi_type"]
+        if self.fmi_type is None:
             raise ValueError("the type of FMU could not be identified")
+        if solver is not None:
+            if solver not in SOLVERS:
+                raise ValueError(
+                    "Unknown solver {}, must be one of {}".format(solver, SOLVERS)
+                )
+            if "modex" not in self.model_info["interfaces"]:
+                raise ValueError("the FMU does not support model exchange")
+            self.fmi_type = "modex"
+        elif self.fmi_type == "modex":
+            solver = "cvode"
+        self.solver = solver
+        self.max_solver_step = max_solver_step
+        self._stepper = None
+        if int(hold_steps) != hold_steps or hold_steps < 1:
+            raise ValueError("hold_steps must be a positive integer")
+        self.hold_steps = int(hold_steps)
+        self.dense_output = dense_output
+        self.history_window = history_window
+        if log_level not in LOG_LEVELS:
+            raise ValueError(
+                "Unknown log level {}, must be one of {}".format(log_level, LOG_LEVELS)
+            )
+        self.log_level = log_level
+        self.fmu_log = collections.deque(maxlen=FMU_LOG_SIZE)
 
         # extract the FMU
         self.start_time = start_time
@@ -187,45 +375,109 @@ class EnvFMU(Env):
         # Fix inputs and outputs keys
         if output_specs is not None:
             self.output_keys = sorted(
-                [
-                    p.name
-                    for p in self.model_description.modelVariables
-                    if p.name in list(output_specs.keys())
-                ]
+                [name for name in variables["names"] if name in output_specs]
             )
             self.__build_output_space(output_specs)
         else:
-            self.output_keys = sorted(
-                [
-                    p.name
-                    for p in self.model_description.modelVariables
-                    if p.causality == "output"
-                ]
-            )
+            self.output_keys = list(self.model_info["outputs"])
 
         if input_specs is not None:
             self.input_keys = sorted(
-                [
-                    p.name
-                    for p in self.model_description.modelVariables
-                    if p.name in list(input_specs.keys())
-                ]
+                [name for name in variables["names"] if name in input_specs]
             )
             self.__build_input_space(input_specs)
         else:
-            self.input_keys = sorted(
-                [
-                    p.name
-                    for p in self.model_description.modelVariables
-                    if p.causality == "input"
-                ]
-            )
+            self.input_keys = list(self.model_info["inputs"])
+        self._all_output_keys = list(self.output_keys)
+        self._all_output_space = getattr(self, "output_space", None)
 
         self.kpis = KPI(kpi_options)
+        self._build_step_plan()
+        self._build_calendar()
+        self._build_history()
 
         # # initialize FMU and spaces
         self.initialize()
 
+    @property
+    def model_description(self):
+        """Full FMPy model description, parsed from the FMU on first access."""
+        if self._model_description is None:
+            self._model_description = read_model_description(self.fmu_file)
+        return self._model_description
+
+    def _build_step_plan(self):
+        """Precomputes the value references and buffers used by step().
+
+        The inputs are written from a preallocated vector which is reset to
+        the default inputs before each step and patched with the given
+        values. The outputs are read into a preallocated vector, and into a
+        matrix for the dense output of held steps. The positions of the KPI
+        variables in the output vector are stored as well.
+        """
+        self._input_index = {key: i for i, key in enumerate(self.input_keys)}
+        self._input_vrs = np.array(
+            [self.vrs[key] for key in self.input_keys], dtype=np.uint32
+        )
+        self._input_defaults = np.array(
+            [
+                self.input_specs[key].get("default", 0.0)
+                if self.input_specs is not None and key in self.input_specs
+                else 0.0
+                for key in self.input_keys
+            ],
+            dtype=np.float64,
+        )
+        self._input_values = self._input_defaults.copy()
+        self._output_vrs = np.array(
+            [self.vrs[key] for key in self.output_keys], dtype=np.uint32
+        )
+        self._output_values = np.zeros(len(self.output_keys), dtype=np.float64)
+        if self.dense_output:
+            self.dense_outputs = np.zeros(
+                (self.hold_steps, len(self.output_keys)), dtype=np.float64
+            )
+        else:
+            self.dense_outputs = None
+        output_index = {key: i for i, key in enumerate(self.output_keys)}
+        kpi_names = {options["name"] for options in self.kpis.kpi_options.values()}
+        self._kpi_outputs = [
+            (name, output_index[name]) for name in kpi_names if name in output_index
+        ]
+        self._input_vrs_ptr = self._input_vrs.ctypes.data_as(POINTER(c_uint))
+        self._input_values_ptr = self._input_values.ctypes.data_as(POINTER(c_double))
+        self._output_vrs_ptr = self._output_vrs.ctypes.data_as(POINTER(c_uint))
+        self._output_values_ptr = self._output_values.ctypes.data_as(
+            POINTER(c_double)
+        )
+
+    def _set_inputs(self):
+        """Writes the input vector of the step plan to the FMU."""
+        if len(self._input_vrs) > 0:
+            self._fmi_set_real(
+                self.fmu.component,
+                self._input_vrs_ptr,
+                len(self._input_vrs),
+                self._input_values_ptr,
+            )
+
+    def _get_outputs(self):
+        """Reads the outputs of the step plan from the FMU.
+
+        Returns
+        -------
+        np.ndarray
+            The output vector of the step plan, overwritten at each call.
+        """
+        if len(self._output_vrs) > 0:
+            self._fmi_get_real(
+                self.fmu.component,
+                self._output_vrs_ptr,
+                len(self._output_vrs),
+                self._output_values_ptr,
+            )
+        return self._output_values
+
     def __build_input_space(self, input_specs):
         """Collects the inputs from the simulation object.
 
@@ -298,28 +550,159 @@ class EnvFMU(Env):
             elif obs_specs["type"] == "discrete":
                 output_space_list += [(obs_name, Discrete(obs_specs["size"]))]
         self.output_space = Dict(spaces=output_space_list)
-        self.observation_history = []
 
-    def __initialize_fmu(self):
-        """Initializes the FMU after instantiation."""
-        if self.fmi_version == "1.0":
-            self.fmu.initialize(tStart=self.start_time, stopTime=self.stop_time)
-        elif self.fmi_version == "2.0":
-            self.fmu.enterInitializationMode()
-            self.fmu.exitInitializationMode()
+    def __initialize_fmu(self, save_reset_state=True):
+        """Initializes the FMU after instantiation.
+
+        Parameters
+        ----------
+        save_reset_state : bool, optional
+            Whether the state after initialization is captured as the target
+            of reset(), if none was captured yet, by default True
+        """
+        with _instance_lock:
+            if self.fmi_version == "1.0":
+                if self.fmi_type == "cosim":
+                    self.fmu.initialize(
+                        tStart=self.start_time, stopTime=self.stop_time
+                    )
+                else:
+                    self.fmu.setTime(self.start_time)
+                    self.fmu.initialize()
+            elif self.fmi_version == "2.0":
+                self.fmu.enterInitializationMode()
+                self.fmu.exitInitializationMode()
+        if self.fmi_type == "modex":
+            self._stepper = ModelExchangeStepper(
+                self.fmu,
+                self.fmi_version,
+                self.model_info["number_of_continuous_states"],
+                self.model_info["number_of_event_indicators"],
+                self.solver,
+                self.max_solver_step,
+            )
+            self._stepper.initialize(self.time)
         self.is_fmu_initialized = True
+        if save_reset_state and self._reset_state is None:
+            self._save_reset_state()
+
+    def supports_fmu_state(self):
+        """Checks whether the FMU can get and set its state.
+
+        Returns
+        -------
+        bool
+            True if the FMU is an FMI 2.0 FMU advertising canGetAndSetFMUstate
+        """
+        if self.fmi_version != "2.0":
+            return False
+        interface = self.model_info["interfaces"][self.fmi_type]
+        return interface["can_get_and_set_fmu_state"]
+
+    def _save_reset_state(self):
+        """Captures the current FMU state as the target of reset()."""
+        if not (self.fast_reset and self.supports_fmu_state()):
+            return
+        if self._reset_state is not None:
+            self.fmu.freeFMUstate(self._reset_state)
+        self._reset_state = self.fmu.getFMUstate()
+        self._reset_time = self.time
+        self._reset_state_data = None
+
+    def _free_reset_state(self):
+        """Releases the FMU state captured for reset()."""
+        if self._reset_state is not None:
+            self.fmu.freeFMUstate(self._reset_state)
+            self._reset_state = None
+            self._reset_time = None
+            self._reset_state_data = None
+
+    def supports_fmu_serialization(self):
+        """Checks whether the FMU can serialize its state.
+
+        Returns
+        -------
+        bool
+            True if the FMU is an FMI 2.0 FMU advertising canGetAndSetFMUstate
+            and canSerializeFMUstate
+        """
+        if not self.supports_fmu_state():
+            return False
+        interface = self.model_info["interfaces"][self.fmi_type]
+        return interface["can_serialize_fmu_state"]
+
+    def _serialize_fmu_state(self, state=None):
+        """Serializes an FMU state, by default the current one.
+
+        Parameters
+        ----------
+        state : fmi2FMUstate, optional
+            State captured with getFMUstate(), by default None
+
+        Returns
+        -------
+        bytes
+            The serialized state.
+        """
+        if state is not None:
+            return self.fmu.serializeFMUstate(state)
+        state = self.fmu.getFMUstate()
+        try:
+            return self.fmu.serializeFMUstate(state)
+        finally:
+            self.fmu.freeFMUstate(state)
+
+    def _deserialize_fmu_state(self, data):
+        """Deserializes an FMU state in the FMU instance.
+
+        Parameters
+        ----------
+        data : bytes
+            State serialized by an instance of the same FMU.
+
+        Returns
+        -------
+        fmi2FMUstate
+            The state, to be freed with freeFMUstate().
+        """
+        return self.fmu.deSerializeFMUstate(data, fmi2FMUstate())
+
+    def _set_serialized_fmu_state(self, data, time):
+        """Sets the FMU instance to a serialized state at a given time."""
+        state = self._deserialize_fmu_state(data)
+        try:
+            self.fmu.setFMUstate(state)
+        finally:
+            self.fmu.freeFMUstate(state)
+        self.time = time
+        if self._stepper is not None:
+            self._stepper.reset(time)
 
     def initialize(self):
         """Initializes simulation object.
 
         Instantiates FMPy FMUSalve1 or FMUSlave2 object based on FMI
-        version detected.
+        version detected. The FMU is extracted once in the cache and the
+        instance only gets its own copy of the resources folder.
         """
         init_time = str(time.time())[0:10]
-        random_id = str(uuid.uuid4().fields[-1])[:7]
-        fmu_path = os.path.join(self.runs_path, init_time + "_" + random_id)
+        self.instance_id = init_time + "_" + uuid.uuid4().hex
+        fmu_path = os.path.join(self.runs_path, self.instance_id)
         os.mkdir(fmu_path)
-        self.unzipdir = extract(self.fmu_file, unzipdir=fmu_path)
+        shared_dir = extract_cached(self.fmu_file, self.fmu_cache_path)
+        # FMUs that can only be instantiated once per process keep global
+        # state in their binaries, further instances get a private copy
+        copy_folders = []
+        self._shared_binaries = None
+        interface = self.model_info["interfaces"][self.fmi_type]
+        if interface["can_be_instantiated_only_once_per_process"]:
+            with _instance_lock:
+                if shared_dir in _shared_binaries_in_use:
+                    copy_folders = ["binaries"]
+                else:
+                    _shared_binaries_in_use.add(shared_dir)
+                    self._shared_binaries = shared_dir
+        self.unzipdir = create_instance_dir(shared_dir, fmu_path, copy_folders)
         weather_folder = Path(self.unzipdir) / "resources"
         possible_weather_files = list(weather_folder.rglob("*.mos")) + list(
             weather_folder.rglob("*.epw")
@@ -332,38 +715,95 @@ class EnvFMU(Env):
             logging.error(e)
             logging.error("Problem with the weather file handling")
         # initialize
-        instance_name = "instance" + init_time
-
-        # model identifier
-        if self.fmi_type == "modex":
-            model_id = self.model_description.modelExchange.modelIdentifier
-        else:
-            model_id = self.model_description.coSimulation.modelIdentifier
+        instance_name = "instance" + self.instance_id
+        self.output_dirs = self._get_output_dirs(instance_name)
 
         kwargs = dict(
-            guid=self.model_description.guid,
+            guid=self.model_info["guid"],
             unzipDirectory=self.unzipdir,
-            modelIdentifier=model_id,
+            modelIdentifier=interface["model_identifier"],
             instanceName=instance_name,
         )
 
+        with _instance_lock:
+            if self.fmi_version == "1.0":
+                if self.fmi_type == "cosim":
+                    self.fmu = FMU1Slave(**kwargs)
+                else:
+                    self.fmu = FMU1Model(**kwargs)
+            elif self.fmi_version == "2.0":
+                if self.fmi_type == "cosim":
+                    self.fmu = FMU2Slave(**kwargs)
+                else:
+                    self.fmu = FMU2Model(**kwargs)
+
+        # raw FMI functions used with the buffers of the step plan
         if self.fmi_version == "1.0":
-            if self.fmi_type == "cosim":
-                self.fmu = FMU1Slave(**kwargs)
-            else:
-                self.fmu = FMU1Model(**kwargs)
-        elif self.fmi_version == "2.0":
-            if self.fmi_type == "cosim":
-                self.fmu = FMU2Slave(**kwargs)
+            self._fmi_set_real = self.fmu.fmi1SetReal
+            self._fmi_get_real = self.fmu.fmi1GetReal
+        else:
+            self._fmi_set_real = self.fmu.fmi2SetReal
+            self._fmi_get_real = self.fmu.fmi2GetReal
+
+        callbacks = self._build_fmi_callbacks()
+        logging_on = self.log_level != "off"
+        with _instance_lock:
+            if self.fmi_version == "1.0":
+                self.fmu.instantiate(functions=callbacks, loggingOn=logging_on)
             else:
-                self.fmu = FMU2Model(**kwargs)
-
-        self.fmu.instantiate(loggingOn=True)
+                self.fmu.instantiate(callbacks=callbacks, loggingOn=logging_on)
         if self.fmi_version == "2.0":
             self.fmu.setupExperiment(startTime=self.start_time, stopTime=self.stop_time)
 
         # Initialize time and the last_output values
         self.time = self.start_time
+        self._history_count = 0
+
+    def _build_fmi_callbacks(self):
+        """Builds the FMI callback functions passing the log messages of the
+        FMU to _log_fmu_message()."""
+        if self.fmi_version == "1.0":
+            callbacks = fmi1CallbackFunctions()
+            callbacks.logger = fmi1CallbackLoggerTYPE(self._log_fmu_message)
+            callbacks.allocateMemory = fmi1CallbackAllocateMemoryTYPE(allocateMemory)
+            callbacks.freeMemory = fmi1CallbackFreeMemoryTYPE(freeMemory)
+            callbacks.stepFinished = None
+        else:
+            callbacks = fmi2CallbackFunctions()
+            callbacks.logger = fmi2CallbackLoggerTYPE(self._log_fmu_message)
+            callbacks.allocateMemory = fmi2CallbackAllocateMemoryTYPE(allocateMemory)
+            callbacks.freeMemory = fmi2CallbackFreeMemoryTYPE(freeMemory)
+        return callbacks
+
+    def _log_fmu_message(self, component, instance_name, status, category, message):
+        """Keeps a log message of the FMU in fmu_log and logs it, depending on
+        the log level."""
+        if status < len(FMI_STATUS):
+            label, level = FMI_STATUS[status]
+        else:
+            label, level = str(status), logging.ERROR
+        if self.log_level == "off" or (
+            self.log_level == "errors" and level < logging.ERROR
+        ):
+            return
+        text = message.decode("utf-8", errors="replace") if message else ""
+        self.fmu_log.append((label, text))
+        logger.log(level, "[%s] %s", label, text)
+
+    def _get_output_dirs(self, instance_name):
+        """Returns the folders that the FMU instance writes outside of unzipdir.
+
+        Parameters
+        ----------
+        instance_name : str
+            Unique name of the FMU instance.
+
+        Returns
+        -------
+        list of str
+            Paths of the folders, moved to runs_path or removed on close().
+        """
+        return []
 
     def get_inputs_names(self):
         """Retrieves list of inputs from model description.
@@ -387,6 +827,181 @@ class EnvFMU(Env):
 
         return self.output_keys  # res
 
+    def _build_calendar(self):
+        """Precomputes the date of every step between the start and stop time.
+
+        The dates are computed once per episode in UTC, so that they do not
+        depend on the time zone of the host. They are read by step number in
+        get_date() and get_datetime().
+        """
+        n_steps = int((self.stop_time - self.start_time) // self.step_size) + 1
+        seconds = np.round(self.start_time + self.step_size * np.arange(n_steps))
+        dates = np.datetime64(f"{CALENDAR_YEAR}-01-01", "s") + seconds.astype(
+            "timedelta64[s]"
+        )
+        days = dates.astype("datetime64[D]")
+        months = dates.astype("datetime64[M]")
+        self._calendar_dates = dates
+        self.calendar = {
+            "minute": (
+                dates.astype("datetime64[m]") - dates.astype("datetime64[h]")
+            ).astype(np.int64),
+            "hour": (dates.astype("datetime64[h]") - days).astype(np.int64),
+            "day": (days - months).astype(np.int64) + 1,
+            "month": (months - dates.astype("datetime64[Y]")).astype(np.int64) + 1,
+            # the epoch of numpy, 1970-01-01, is a Thursday
+            "weekday": (days.astype(np.int64) + 3) % 7,
+        }
+
+    def _calendar_step(self):
+        """Returns the step number of the current time in the calendar, None
+        if the time is not one of its steps."""
+        offset = (self.time - self.start_time) / self.step_size
+        step = int(round(offset))
+        if abs(offset - step) > 1e-6 or not 0 <= step < len(self._calendar_dates):
+            return None
+        return step
+
+    def select_outputs(self, keys=None):
+        """Narrows the outputs read from the FMU at every step.
+
+        Only the given outputs and the ones the KPIs are computed from are
+        read from the FMU, post-processed and returned. The output space,
+        the output vectors of step_array() and rollout() and the history
+        follow the selection, and the history is cleared.
+
+        Parameters
+        ----------
+        keys : list of str, optional
+            Output names, by default None, i.e. all outputs of the model
+
+        Raises
+        ------
+        ValueError
+            If a key is not an output of the model.
+        """
+        if keys is None:
+            selected = list(self._all_output_keys)
+        else:
+            unknown = set(keys).difference(self._all_output_keys)
+            if unknown:
+                raise ValueError("Unknown outputs {}".format(sorted(unknown)))
+            kpi_names = {options["name"] for options in self.kpis.kpi_options.values()}
+            selected = [
+                key for key in self._all_output_keys if key in keys or key in kpi_names
+            ]
+        self._set_output_keys(selected)
+
+    def _set_output_keys(self, keys):
+        """Rebuilds the step plan for a subset of the outputs of the model."""
+        self.output_keys = keys
+        if self._all_output_space is not None:
+            spaces = self._all_output_space.spaces
+            self.output_space = Dict(
+                spaces=[(key, spaces[key]) for key in keys if key in spaces]
+            )
+        input_values = self._input_values
+        self._build_step_plan()
+        self._input_values[:] = input_values
+        self._build_history()
+        if self.is_fmu_initialized:
+            self._get_outputs()
+
+    def get_datetime(self):
+        """Gets the current simulation time as a datetime.
+
+        Returns
+        -------
+        datetime.datetime
+            Current simulation time in the calendar year of the simulations
+        """
+        step = self._calendar_step()
+        if step is None:
+            return datetime.datetime(CALENDAR_YEAR, 1, 1) + datetime.timedelta(
+                seconds=round(self.time)
+            )
+        return self._calendar_dates[step].item()
+
+    def _build_history(self):
+        """Preallocates the buffer of the output history.
+
+        A row holds the time and the outputs at the end of a communication
+        step. When the window covers the episode, the buffer holds one row
+        per step. Otherwise it is a ring buffer where every row is written
+        twice, at its position and one window further, so that the last
+        rows of the history are always a contiguous slice of the buffer,
+        which get_history() returns as a view.
+        """
+        if self.history_window is None:
+            window = len(self._calendar_dates)
+        else:
+            window = int(self.history_window)
+        self._history_window = window
+        n_rows = window if window >= len(self._calendar_dates) else 2 * window
+        self._history = np.zeros((n_rows, len(self.output_keys) + 1))
+        self._history_dtype = np.dtype(
+            [("time", np.float64)] + [(key, np.float64) for key in self.output_keys]
+        )
+        self._history_count = 0
+
+    def _record_history(self, outputs):
+        """Writes the outputs of a communication step to the history."""
+        window = self._history_window
+        if window == 0:
+            return
+        if len(self._history) == window:
+            if self._history_count < window:
+                row = self._history[self._history_count]
+                row[0] = self.time
+                row[1:] = outputs
+                self._history_count += 1
+                return
+            # stepping past the stop time, the history turns into a ring
+            self._history = np.concatenate([self._history, self._history])
+        row = self._history[self._history_count % window]
+        row[0] = self.time
+        row[1:] = outputs
+        self._history[self._history_count % window + window] = row
+        self._history_count += 1
+
+    def get_history(self, keys=None, last_n=None):
+        """Gets the outputs of the last steps.
+
+        The history holds the outputs at the end of every communication
+        step since the last reset, i.e. of every step size with dense
+        output, up to history_window steps.
+
+        Parameters
+        ----------
+        keys : str or list of str, optional
+            Output names, by default None, i.e. all outputs
+        last_n : int, optional
+            Number of steps, by default None, i.e. the whole history
+
+        Returns
+        -------
+        np.ndarray
+            Structured array with the field 'time' and one field per output,
+            one row per step from the oldest to the latest. With a single
+            key, the values of the output. The array is a view on the
+            history buffer, which is overwritten once the window is full,
+            copy it to keep the values.
+        """
+        window = self._history_window
+        n_rows = min(self._history_count, window)
+        if last_n is not None:
+            n_rows = min(n_rows, last_n)
+        if len(self._history) == window:
+            end = self._history_count
+        else:
+            end = (self._history_count - 1) % window + window + 1
+        history = self._history[end - n_rows : end].view(self._history_dtype)[:, 0]
+        if keys is None:
+            return history
+        if isinstance(keys, str):
+            return history[keys]
+        return history[["time"] + list(keys)]
+
     def get_date(self):
         """Gets the current simulation time.
 
@@ -401,16 +1016,23 @@ class EnvFMU(Env):
         int
             Month of the current simulation time
         """
-
-        time_tuple = (2013, 1, 1, 0, 0, 0, 1, 1, 0)
-        base_time = time.mktime(time_tuple)
-        date = time.localtime(base_time + self.time)
-        return date[4], date[3], date[2], date[1]
+        step = self._calendar_step()
+        if step is None:
+            date = self.get_datetime()
+            return date.minute, date.hour, date.day, date.month
+        calendar = self.calendar
+        return (
+            int(calendar["minute"][step]),
+            int(calendar["hour"][step]),
+            int(calendar["day"][step]),
+            int(calendar["month"][step]),
+        )
 
     def step(self, inputs=None):
         """Advances the simulation one timestep.
 
         Applies input for current step, simulate the system in FMU and retrieves outputs.
+        With hold_steps > 1, the timestep spans hold_steps step sizes.
 
         Parameters
         ----------
@@ -435,44 +1057,274 @@ class EnvFMU(Env):
         if bool(inputs):
             inp_keys = sorted(list(inputs.keys()))
             n_steps = len(inputs[inp_keys[0]])
-            non_inp_keys = set(self.input_keys) - set(list(inputs))
         else:
             n_steps = 1
             inp_keys = []
-            non_inp_keys = self.input_keys
+        plan_keys = [key for key in inp_keys if key in self._input_index]
+        plan_positions = [self._input_index[key] for key in plan_keys]
+        other_keys = [key for key in inp_keys if key not in self._input_index]
+        input_values = self._input_values
+        for p in range(n_steps):
+            input_values[:] = self._input_defaults
+            for key, i in zip(plan_keys, plan_positions):
+                input_values[i] = inputs[key][p]
+            if other_keys:
+                self.fmu.setReal(
+                    [self.vrs[key] for key in other_keys],
+                    [inputs[key][p] for key in other_keys],
+                )
+
+            # perform one step and get the values
+            out_values = self._do_step().tolist()
+
+            # append the results
+            res.append((self.time, out_values))
+
+        output = self.post_process(self.output_keys, res, arrays=False)
+
+        if self.hold_steps == 1:
+            self.kpis.add_observation(output)
+        else:
+            self._add_kpi_observation(self._output_values)
+        if self._checkpoint_every is not None:
+            self._count_checkpoint_steps(n_steps)
+        return output
+
+    def step_array(self, u):
+        """Advances the simulation one timestep with an input vector.
+
+        Array counterpart of step(), which builds no dictionaries. Inputs
+        and outputs follow the order of get_inputs_names() and
+        get_outputs_names().
+
+        Parameters
+        ----------
+        u : array_like
+            Input values, one per input name.
+
+        Returns
+        -------
+        np.ndarray
+            Output values, one per output name. The array is a buffer that
+            is overwritten by the next step, copy it to keep the values.
+        """
+        if not self.is_fmu_initialized:
+            self.__initialize_fmu()
+        self._input_values[:] = u
+        outputs = self._do_step()
+        self._add_kpi_observation(outputs)
+        if self._checkpoint_every is not None:
+            self._count_checkpoint_steps(1)
+        return outputs
+
+    def rollout(self, inputs_matrix):
+        """Simulates a whole input trajectory in one call.
+
+        Inputs and outputs follow the order of get_inputs_names() and
+        get_outputs_names(). The KPI observations of all steps are added at
+        once at the end of the rollout. With hold_steps > 1, every row is a
+        held step.
+
+        Parameters
+        ----------
+        inputs_matrix : array_like
+            Input values of shape (N, number of inputs), one row per step.
+
+        Returns
+        -------
+        outputs : np.ndarray
+            Output values of shape (N, number of outputs), one row per step.
+        times : np.ndarray
+            Simulation time at the end of each step, of shape (N,).
+
+        Raises
+        ------
+        ValueError
+            If the shape of inputs_matrix does not match the inputs.
+        """
+        inputs_matrix = np.asarray(inputs_matrix, dtype=np.float64)
+        if inputs_matrix.ndim != 2 or inputs_matrix.shape[1] != len(self.input_keys):
+            raise ValueError(
+                "inputs_matrix must be of shape (N, {}), got {}".format(
+                    len(self.input_keys), inputs_matrix.shape
+                )
+            )
+        if not self.is_fmu_initialized:
+            self.__initialize_fmu()
+        n_steps = inputs_matrix.shape[0]
+        n_outputs = len(self.output_keys)
+        outputs = np.empty((n_steps, n_outputs), dtype=np.float64)
+        times = np.empty(n_steps, dtype=np.float64)
+        if self.dense_output:
+            samples = np.empty((n_steps, self.hold_steps, n_outputs))
         for p in range(n_steps):
-            key_list = []
-            input_list = []
-            for key in inp_keys:
-                key_list.append(self.vrs[key])
-                input_list.append(inputs[key][p])
-            for key in non_inp_keys:
-                key_list.append(self.vrs[key])
-                input_list.append(self.input_specs[key]["default"])
+            self._input_values[:] = inputs_matrix[p]
+            outputs[p] = self._do_step()
+            times[p] = self.time
+            if self.dense_output:
+                samples[p] = self.dense_outputs
+        if self.dense_output:
+            samples = samples.reshape(-1, n_outputs)
+        else:
+            samples = np.repeat(outputs, self.hold_steps, axis=0)
+        self.kpis.add_observation(
+            {name: samples[:, i].tolist() for name, i in self._kpi_outputs}
+        )
+        if self._checkpoint_every is not None:
+            self._count_checkpoint_steps(n_steps)
+        return outputs, times
+
+    @staticmethod
+    def step_array_batch(envs, inputs):
+        """Advances several environments one timestep with input vectors.
+
+        Model-exchange environments using the same fixed-step solver, step
+        size and current time are integrated together, in one vectorized
+        loop over their continuous states. The other environments are
+        stepped one after the other.
+
+        Parameters
+        ----------
+        envs : list of EnvFMU
+            The environments to advance.
+        inputs : list of array_like
+            Input values of each environment, as for step_array().
+
+        Returns
+        -------
+        list of np.ndarray
+            Output values of each environment, as returned by step_array(), i.e.
+            buffers overwritten by the next step.
+        """
+        batches = collections.defaultdict(list)
+        results = {}
+        for env, u in zip(envs, inputs):
+            if not env.is_fmu_initialized:
+                env.__initialize_fmu()
+            env._input_values[:] = u
+            env._prepare_step()
+            stepper = env._stepper
+            if stepper is not None and stepper.is_fixed_step and not env.dense_output:
+                step_size = env.step_size * env.hold_steps
+                key = (stepper.solver, stepper.max_step, step_size, env.time)
+                batches[key].append(env)
+            else:
+                results[env] = env._simulate()
+        for key, batch in batches.items():
+            steppers = [env._stepper for env in batch]
+            # the integrator of a batch is kept until the batch changes
+            integrator = steppers[0].batch_integrator
+            if integrator is None or integrator.steppers != steppers:
+                integrator = FixedStepIntegrator(steppers)
+                for stepper in steppers:
+                    stepper.batch_integrator = integrator
+            step_size = key[2]
+            integrator.do_step(batch[0].time, step_size)
+            for env in batch:
+                results[env] = env._finish_step(step_size)
+        for env in envs:
+            env._add_kpi_observation(results[env])
+            if env._checkpoint_every is not None:
+                env._count_checkpoint_steps(1)
+        return [results[env] for env in envs]
+
+    def _do_step(self):
+        """Simulates one timestep with the input vector of the step plan.
+
+        Returns
+        -------
+        np.ndarray
+            The output vector of the step plan, overwritten at each call.
+        """
+        self._prepare_step()
+        return self._simulate()
+
+    def _prepare_step(self):
+        """Writes the inputs of the step to the FMU."""
+        self._set_inputs()
+        exogenous = self._get_exogenous_inputs()
+        if exogenous:
             self.fmu.setReal(
-                key_list,
-                input_list,
+                [self.vrs[key] for key in exogenous], list(exogenous.values())
             )
 
-            # perform one step
+    def _simulate(self):
+        """Simulates the FMU over the hold_steps step sizes of one step.
+
+        Returns
+        -------
+        np.ndarray
+            The output vector of the step plan, overwritten at each call.
+        """
+        if self.dense_output:
+            for j in range(self.hold_steps):
+                self._advance(self.step_size)
+                self.dense_outputs[j] = self._finish_step(self.step_size)
+            return self._output_values
+        step_size = self.step_size * self.hold_steps
+        self._advance(step_size)
+        return self._finish_step(step_size)
+
+    def _advance(self, step_size):
+        """Simulates the FMU over one communication step."""
+        if self._stepper is None:
             self.fmu.doStep(
                 currentCommunicationPoint=self.time,
-                communicationStepSize=self.step_size,
+                communicationStepSize=step_size,
             )
+        else:
+            self._stepper.do_step(self.time, step_size)
 
-            # get the values
-            out_values = self.fmu.getReal([self.vrs[key] for key in self.output_keys])
+    def _finish_step(self, step_size):
+        """Reads the outputs of a communication step and advances the time.
 
-            # advance the time
-            self.time += self.step_size
+        Returns
+        -------
+        np.ndarray
+            The output vector of the step plan, overwritten at each call.
+        """
+        outputs = self._get_outputs()
+        self.time += step_size
+        self._record_history(outputs)
+        return outputs
 
-            # append the results
-            res.append((self.time, out_values))
+    def _add_kpi_observation(self, outputs):
+        """Adds the KPI values of the last step, one per step size.
 
-        output = self.post_process(self.output_keys, res, arrays=False)
+        Without dense output, the values at the end of a held step stand
+        for all of its step sizes, so that the KPIs keep their time
+        weighting.
 
-        self.kpis.add_observation(output)
-        return output
+        Parameters
+        ----------
+        outputs : np.ndarray
+            The output vector of the step.
+        """
+        if self.hold_steps == 1:
+            observation = {name: float(outputs[i]) for name, i in self._kpi_outputs}
+        elif self.dense_output:
+            observation = {
+                name: self.dense_outputs[:, i].tolist() for name, i in self._kpi_outputs
+            }
+        else:
+            observation = {
+                name: [float(outputs[i])] * self.hold_steps
+                for name, i in self._kpi_outputs
+            }
+        self.kpis.add_observation(observation)
+
+    def _get_exogenous_inputs(self):
+        """Returns the inputs set by the environment itself before each step.
+
+        Models driven by schedules (e.g. EV availability) override this
+        method. The inputs are applied after the ones given to step().
+
+        Returns
+        -------
+        dict
+            Input values for the current timestep, keyed by input name.
+        """
+        return {}
 
     def print_kpis(self):
         """Prints the KPIs."""
@@ -541,18 +1393,24 @@ class EnvFMU(Env):
         action = self.input_space.sample()
         return dict(list(action.items()))
 
-    def get_forecast(self, forecast_length=24):
+    def get_forecast(self, forecast_length=24, n_members=None):
         """Generates a weather forecast of a given length.
 
         Parameters
         ----------
         forecast_length : int, optional
             Number of timesteps that will be forecasted, by default 24
+        n_members : int, optional
+            Number of members of a forecast ensemble, by default None, i.e.
+            a single forecast. The members of a stochastic forecast are
+            independent realizations, those of the other methods are equal.
 
         Returns
         -------
         forecast : dict
-            Forecasted values for default keys or ones specified in kwargs
+            Forecasted values for default keys or ones specified in kwargs,
+            as arrays of shape (forecast_length,), or (n_members,
+            forecast_length) if n_members is given
         """
         time_resolution = self.step_size / 60
         hourly_steps = int(60 / time_resolution)
@@ -563,29 +1421,32 @@ class EnvFMU(Env):
         if isinstance(self.weather, EPW):
             minute, hour, day, month = self.get_date()
             start_index = int(minute / time_resolution)
-            forecast = self.weather.get_forecast(hour, day, month, tot_length)
+            forecast = self.weather.get_forecast(
+                hour, day, month, tot_length, n_members
+            )
 
         elif isinstance(self.weather, MOS):
             res = self.time % 3600
             start_index = int(res / self.step_size)
-            forecast = self.weather.get_forecast(self.time - res, forecast_length)
+            forecast = self.weather.get_forecast(
+                self.time - res, forecast_length, n_members
+            )
         forecast = self._interpolate_forecast(forecast, hourly_steps)
         for key in forecast:
-            forecast[key] = forecast[key][start_index : forecast_length + start_index]
+            forecast[key] = forecast[key][
+                ..., start_index : forecast_length + start_index
+            ]
         return forecast
 
     def _interpolate_forecast(self, forecast, hourly_steps):
+        """Interpolates hourly forecasts linearly at every step."""
+        weights = np.arange(hourly_steps) / hourly_steps
         for key in forecast:
-            mod_list = forecast[key]
-            new_list = []
-            for i in range(len(mod_list) - 1):
-                for j in range(hourly_steps):
-                    weight = j / hourly_steps
-                    new_list.append(
-                        (1 - weight) * mod_list[i] + weight * mod_list[i + 1]
-                    )
-            new_list.append(mod_list[len(mod_list) - 1])
-            forecast[key] = new_list
+            values = np.asarray(forecast[key], dtype=np.float64)
+            before, after = values[..., :-1, None], values[..., 1:, None]
+            steps = (1 - weights) * before + weights * after
+            steps = steps.reshape(values.shape[:-1] + (-1,))
+            forecast[key] = np.concatenate([steps, values[..., -1:]], axis=-1)
         return forecast
 
     def look_for_weather_file(
@@ -689,39 +1550,307 @@ class EnvFMU(Env):
         return dic_res
 
     def reset(self):
-        """Resets the simulation."""
-        self.close()
-        self.kpis.reset()
-        self.initialize()
+        """Resets the simulation.
+
+        If an FMU state was captured after initialization, it is restored in
+        place. Otherwise the FMU is closed and initialized again.
+        """
+        self._steps_since_checkpoint = 0
+        if self._reset_state is not None:
+            self.fmu.setFMUstate(self._reset_state)
+            self.time = self._reset_time
+            if self._stepper is not None:
+                self._stepper.reset(self.time)
+            self._input_values[:] = self._input_defaults
+            self.kpis.reset()
+            self._history_count = 0
+        else:
+            self.close()
+            self.kpis.reset()
+            self.initialize()
+
+    def clone(self):
+        """Creates an independent copy of the environment in its current state.
+
+        See fork().
+
+        Returns
+        -------
+        EnvFMU
+            The copy.
+        """
+        return self.fork(1)[0]
+
+    def fork(self, n):
+        """Creates n independent copies of the environment in its current state.
+
+        The FMU state is serialized once and deserialized into other FMU
+        instances, which are taken from the pool of idle instances filled by
+        release() or created. The copies get the time, the inputs and outputs
+        of the last step and a copy of the output history and of the KPI
+        observations, reset() brings them back to the start of the
+        simulation. The weather and the schedules are shared, they are
+        indexed by the simulation time.
+
+        Parameters
+        ----------
+        n : int
+            Number of copies.
+
+        Returns
+        -------
+        list of EnvFMU
+            The copies, to be released or closed when not needed any more.
+
+        Raises
+        ------
+        Exception
+            If the FMU cannot serialize its state.
+        """
+        if not self.supports_fmu_serialization():
+            raise Exception(
+                "The FMU {} cannot serialize its state, it cannot be "
+                "cloned".format(self.fmu_file)
+            )
+        if not self.is_fmu_initialized:
+            self.__initialize_fmu()
+        data = self._serialize_fmu_state()
+        if self._reset_state is not None and self._reset_state_data is None:
+            self._reset_state_data = self._serialize_fmu_state(self._reset_state)
+        clones = []
+        for _ in range(n):
+            env = self._clone_pool.pop() if self._clone_pool else self._new_clone()
+            if env.output_keys != self.output_keys:
+                env._set_output_keys(self.output_keys)
+            if self._reset_state_data is not None:
+                if env._reset_state_data is not self._reset_state_data:
+                    env._free_reset_state()
+                    env._reset_state = env._deserialize_fmu_state(
+                        self._reset_state_data
+                    )
+                    env._reset_state_data = self._reset_state_data
+                env._reset_time = self._reset_time
+            env._set_serialized_fmu_state(data, self.time)
+            env._input_values[:] = self._input_values
+            env._output_values[:] = self._output_values
+            if self.dense_outputs is not None:
+                env.dense_outputs[:] = self.dense_outputs
+            env._history = self._history.copy()
+            env._history_count = self._history_count
+            env.kpis = copy.deepcopy(self.kpis)
+            clones.append(env)
+        return clones
+
+    def _new_clone(self):
+        """Creates an environment sharing the configuration of this one, with
+        its own initialized FMU instance."""
+        env = copy.copy(self)
+        env.is_fmu_initialized = False
+        env._reset_state = None
+        env._reset_time = None
+        env._reset_state_data = None
+        env._stepper = None
+        env._checkpoint_path = None
+        env._checkpoint_every = None
+        env._steps_since_checkpoint = 0
+        env.fmu_log = collections.deque(maxlen=FMU_LOG_SIZE)
+        env._build_step_plan()
+        env._build_history()
+        # fork() overwrites the state of the copy, so that the warm-up of
+        # subclasses is skipped and the reset state is the one of the parent
+        EnvFMU.initialize(env)
+        if not env.is_fmu_initialized:
+            env.__initialize_fmu(save_reset_state=False)
+        return env
+
+    def release(self):
+        """Returns a copy made by fork() to the pool of idle instances.
+
+        The FMU instance stays alive and is reused by the next fork() of the
+        environment or of its copies. The released copy must not be used
+        any more.
+        """
+        self._clone_pool.append(self)
+
+    def checkpoint(self, path):
+        """Writes the state of the simulation to a file.
+
+        The checkpoint holds the serialized FMU state, the time, the KPI
+        observations, the state restored by reset() and the schedules of
+        the environment. It is written to a temporary file first, so that an
+        interrupted write keeps the previous checkpoint.
+
+        Parameters
+        ----------
+        path : str
+            File of the checkpoint. "{time}" in the path is replaced by the
+            simulation time in seconds.
+
+        Returns
+        -------
+        str
+            The path of the written file.
+
+        Raises
+        ------
+        Exception
+            If the FMU cannot serialize its state.
+        """
+        if not self.supports_fmu_serialization():
+            raise Exception(
+                "The FMU {} cannot serialize its state, no checkpoint can be "
+                "written".format(self.fmu_file)
+            )
+        if not self.is_fmu_initialized:
+            self.__initialize_fmu()
+        if self._reset_state is not None and self._reset_state_data is None:
+            self._reset_state_data = self._serialize_fmu_state(self._reset_state)
+        data = {
+            "guid": self.model_info["guid"],
+            "time": self.time,
+            "fmu_state": self._serialize_fmu_state(),
+            "reset_state": self._reset_state_data,
+            "reset_time": self._reset_time,
+            "input_values": self._input_values,
+            "output_values": self._output_values,
+            "kpis": self.kpis,
+            "schedules": {
+                name: value
+                for name, value in vars(self).items()
+                if isinstance(value, ScheduleAbstract)
+            },
+        }
+        path = str(path).replace("{time}", str(int(self.time)))
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return path
+
+    def set_checkpoints(self, path, every):
+        """Writes a checkpoint periodically while stepping.
+
+        Parameters
+        ----------
+        path : str
+            File of the checkpoints, as for checkpoint(). Without "{time}",
+            every checkpoint replaces the previous one.
+        every : int
+            Number of steps between two checkpoints, None to stop writing
+            checkpoints.
+
+        Raises
+        ------
+        Exception
+            If the FMU cannot serialize its state.
+        """
+        if every is not None and not self.supports_fmu_serialization():
+            raise Exception(
+                "The FMU {} cannot serialize its state, no checkpoint can be "
+                "written".format(self.fmu_file)
+            )
+        self._checkpoint_path = path
+        self._checkpoint_every = every
+        self._steps_since_checkpoint = 0
+
+    def _count_checkpoint_steps(self, n_steps):
+        """Writes a checkpoint if enough steps were taken since the last one."""
+        self._steps_since_checkpoint += n_steps
+        if self._steps_since_checkpoint >= self._checkpoint_every:
+            self.checkpoint(self._checkpoint_path)
+            self._steps_since_checkpoint = 0
+
+    def resume(self, path):
+        """Continues the simulation from a checkpoint.
+
+        The environment must be created with the same model and options as
+        the one that wrote the checkpoint, e.g. with the same arguments to
+        energym.make(). Its FMU, time, KPI observations and schedules are
+        replaced by the ones of the checkpoint.
+
+        Parameters
+        ----------
+        path : str
+            File written by checkpoint().
+
+        Raises
+        ------
+        Exception
+            If the FMU cannot serialize its state or if the checkpoint was
+            written by another FMU.
+        """
+        if not self.supports_fmu_serialization():
+            raise Exception(
+                "The FMU {} cannot serialize its state, it cannot "
+                "resume".format(self.fmu_file)
+            )
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+        if data["guid"] != self.model_info["guid"]:
+            raise Exception(
+                "The checkpoint {} was written by another FMU".format(path)
+            )
+        if not self.is_fmu_initialized:
+            self.__initialize_fmu()
+        if data["reset_state"] is not None:
+            self._free_reset_state()
+            self._reset_state = self._deserialize_fmu_state(data["reset_state"])
+            self._reset_state_data = data["reset_state"]
+            self._reset_time = data["reset_time"]
+        self._set_serialized_fmu_state(data["fmu_state"], data["time"])
+        self._input_values[:] = data["input_values"]
+        self._output_values[:] = data["output_values"]
+        self.kpis = data["kpis"]
+        for name, value in data["schedules"].items():
+            setattr(self, name, value)
+        self._steps_since_checkpoint = 0
+        self._history_count = 0
 
     def close(self, save=True):
-        """Terminates the FMU and removes leftover folders."""
-        instance_name = self.fmu.instanceName
-        self.fmu.terminate()
-        self.fmu.freeInstance()
+        """Terminates the FMU and removes leftover folders.
+
+        Parameters
+        ----------
+        save : bool, optional
+            Whether the folders written by the FMU are moved to the runs
+            folder rather than removed, by default True. They are always
+            removed with the log level 'off'
+        """
+        save = save and self.log_level != "off"
+        while self._clone_pool:
+            env = self._clone_pool.pop()
+            if env is not self:
+                env.close(save)
+        self._free_reset_state()
+        # terminate() is only allowed once the FMU is initialized
+        if self.is_fmu_initialized:
+            self.fmu.terminate()
+        if self._stepper is not None:
+            self._stepper.close()
+            self._stepper = None
+        with _instance_lock:
+            self.fmu.freeInstance()
+            _shared_binaries_in_use.discard(self._shared_binaries)
         self.is_fmu_initialized = False
         try:
             shutil.rmtree(self.unzipdir)
         except PermissionError as e:
             logger.error(f"Folder could not be removed. {e}")
-        cwd = os.getcwd()
-        wd_sub_list = os.listdir(cwd)
-        if save:
-            for directory in wd_sub_list:
-                if instance_name in directory:
-                    try:
-                        shutil.move(
-                            os.path.join(cwd, directory),
-                            os.path.join(self.runs_path, directory),
-                        )
-                    except PermissionError as e:
-                        logger.error(f"Folder could not be moved. {e}")
-        else:
-            for directory in wd_sub_list:
-                if instance_name in directory:
-                    try:
-                        shutil.rmtree(
-                            os.path.join(cwd, directory),
-                        )
-                    except PermissionError as e:
-                        logger.error(f"Folder could not be removed. {e}")
+        for directory in self.output_dirs:
+            if not os.path.isdir(directory):
+                continue
+            if save:
+                try:
+                    shutil.move(
+                        directory,
+                        os.path.join(self.runs_path, os.path.basename(directory)),
+                    )
+                except PermissionError as e:
+                    logger.error(f"Folder could not be moved. {e}")
+            else:
+                try:
+                    shutil.rmtree(directory)
+                except PermissionError as e:
+                    logger.error(f"Folder could not be removed. {e}")
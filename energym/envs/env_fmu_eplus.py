@@ -1,8 +1,14 @@
 import os
+import collections
 
 import energym
 from energym.envs.env_fmu import EnvFMU
 from energym.envs.utils.weather import EPW
+from energym.envs.utils.state_library import (
+    state_library_dir,
+    write_snapshot,
+    find_snapshot,
+)
 from energym.envs.weather_names import WEATHERNAMES
 
 
@@ -11,6 +17,15 @@ class EnvEPlusFMU(EnvFMU):
 
     Subclasses EnvFMU and inherits its behavior. Defines EnergyPlus
     specific simulation details.
+
+    If the FMU can serialize its state and the state library holds a
+    snapshot of the model with the same weather file before the start of
+    the simulation, the simulation starts from this snapshot instead of
+    warming up EnergyPlus. The snapshots are written with
+    write_state_library(), see scripts/build_state_library.py. They hold
+    the state of a continuous run from January 1 with the default inputs,
+    which differs from the state of an EnergyPlus warm-up at the start
+    date.
     """
 
     def __init__(
@@ -27,7 +42,11 @@ class EnvEPlusFMU(EnvFMU):
             default_path=True,
             generate_forecasts=True,
             generate_forecast_method='perfect',
-            generate_forecast_keys=None
+            generate_forecast_keys=None,
+            fast_reset=True,
+            history_window=None,
+            log_level="full",
+            generate_forecast_seed=None,
     ):
         """
         Parameters
@@ -52,6 +71,17 @@ class EnvEPlusFMU(EnvFMU):
             Dict to specify the tracked KPIs.
         default_path : bool
             Whether to use the default path or an absolute path in model_path and weather
+        fast_reset : bool, optional
+            Whether reset() restores the FMU state captured after the warm-up
+            step, when supported by the FMU, by default True
+        history_window : int, optional
+            Number of steps kept in the output history, by default None, i.e.
+            the whole simulation
+        log_level : str, optional
+            Messages of the FMU that are logged, 'off', 'errors' or 'full',
+            by default 'full'
+        generate_forecast_seed : int or np.random.Generator, optional
+            Seed of the 'stochastic' forecasts, by default None
 
 
         Raises
@@ -84,13 +114,13 @@ class EnvEPlusFMU(EnvFMU):
                 )
 
                 weather_epw.read(weather_file, generate_forecasts, generate_forecast_method,
-                                 generate_forecast_keys)
+                                 generate_forecast_keys, generate_forecast_seed)
             else:
                 raise Exception("Unknown weather file")
         else:
             weather_file = weather
             weather_epw.read(weather, generate_forecasts, generate_forecast_method,
-                             generate_forecast_keys)
+                             generate_forecast_keys, generate_forecast_seed)
             fmu_file = model_path
 
         super().__init__(
@@ -103,7 +133,10 @@ class EnvEPlusFMU(EnvFMU):
             output_specs,
             kpi_options,
             default_path,
-            weather_file
+            weather_file,
+            fast_reset=fast_reset,
+            history_window=history_window,
+            log_level=log_level,
         )
 
 
@@ -113,11 +146,116 @@ class EnvEPlusFMU(EnvFMU):
 
         Instantiates FMPy FMUSalve1 or FMUSlave2 object based on FMI
         version detected. For E+, by default, an empty stepp is made at the beginning
-        and default step parameters are done.
+        and default step parameters are done. The state after this step is
+        restored from the state library when available.
         """
         super().initialize()
         self._last_output = {}
-        _ = self.step({})
+        if not self._restore_snapshot():
+            _ = self.step({})
+        self._save_reset_state()
+
+    @property
+    def state_library_dir(self):
+        """Folder of the snapshots of the model with its weather file."""
+        return state_library_dir(
+            os.path.join(self.runs_path, "state_library"),
+            self.model_info["guid"],
+            self.weather_file_path,
+        )
+
+    def _restore_snapshot(self):
+        """Restores the state after the first step from the state library.
+
+        The latest snapshot before the end of the first step is restored and
+        the simulation is advanced with the default inputs up to it.
+
+        Returns
+        -------
+        bool
+            Whether a snapshot was restored.
+        """
+        if not self.supports_fmu_serialization():
+            return False
+        target_time = self.start_time + self.step_size
+        snapshot = find_snapshot(self.state_library_dir, target_time)
+        if snapshot is None:
+            return False
+        self._set_serialized_fmu_state(snapshot["fmu_state"], snapshot["time"])
+        self.is_fmu_initialized = True
+        self._output_values[:] = snapshot["output_values"]
+        while self.time < target_time:
+            self.step_array(self._input_defaults)
+        # only the first step is observed, as after a warm-up
+        self._last_output = None
+        self.kpis.reset()
+        self.kpis.add_observation(self.get_output())
+        self._history_count = 0
+        self._record_history(self._output_values)
+        self._steps_since_checkpoint = 0
+        return True
+
+    def write_state_library(self):
+        """Writes snapshots of the simulation at every day boundary.
+
+        The simulation is run with the default inputs until the stop time.
+        A snapshot is written at the end of the first step of every day.
+        An environment started from it continues this run, it does not
+        reach the state of a fresh EnergyPlus warm-up at its start date.
+
+        Returns
+        -------
+        list of str
+            Paths of the snapshot files.
+
+        Raises
+        ------
+        Exception
+            If the FMU cannot serialize its state.
+        """
+        if not self.supports_fmu_serialization():
+            raise Exception(
+                "The FMU {} cannot serialize its state, no state library can be "
+                "written".format(self.fmu_file)
+            )
+        directory = self.state_library_dir
+        paths = []
+        while self.time < self.stop_time:
+            if (self.time - self.step_size) % (24 * 3600) == 0:
+                paths.append(
+                    write_snapshot(
+                        directory,
+                        self.time,
+                        self._serialize_fmu_state(),
+                        self._output_values.copy(),
+                    )
+                )
+            self.step_array(self._input_defaults)
+        return paths
+
+    def _get_output_dirs(self, instance_name):
+        # EnergyPlus writes its outputs in the working directory
+        return [os.path.join(os.getcwd(), "Output_EPExport_" + instance_name)]
+
+    def _save_reset_state(self):
+        super()._save_reset_state()
+        self._reset_output = self.get_output()
+
+    def reset(self):
+        """Resets the simulation.
+
+        After a restored FMU state, the outputs of the first step are
+        observed again, as after initialize().
+        """
+        fast_reset = self._reset_state is not None
+        super().reset()
+        self._last_output = self._reset_output
+        if fast_reset:
+            self._output_values[:] = [
+                self._reset_output[key] for key in self.output_keys
+            ]
+            self.kpis.add_observation(self._reset_output)
+            self._record_history(self._output_values)
 
     def step(self, inputs=None):
         if inputs is None:
@@ -126,5 +264,25 @@ class EnvEPlusFMU(EnvFMU):
         self._last_output = output
         return output
 
+    def _set_output_keys(self, keys):
+        super()._set_output_keys(keys)
+        self._last_output = None
+        reset_output = getattr(self, "_reset_output", None)
+        if reset_output is not None:
+            self._reset_output = collections.OrderedDict(
+                (key, value)
+                for key, value in reset_output.items()
+                if key == "time" or key in keys
+            )
+
+    def _finish_step(self, step_size):
+        output = super()._finish_step(step_size)
+        self._last_output = None
+        return output
+
     def get_output(self):
+        if self._last_output is None:
+            self._last_output = self.post_process(
+                self.output_keys, [(self.time, self._output_values.tolist())]
+            )
         return self._last_output
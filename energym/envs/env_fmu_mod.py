@@ -39,6 +39,14 @@ class EnvModFMU(EnvFMU):
         generate_forecasts=True,
         generate_forecast_method="perfect",
         generate_forecast_keys=None,
+        fast_reset=True,
+        solver=None,
+        max_solver_step=None,
+        hold_steps=1,
+        dense_output=False,
+        history_window=None,
+        log_level="full",
+        generate_forecast_seed=None,
     ):
         """
         Parameters
@@ -63,6 +71,30 @@ class EnvModFMU(EnvFMU):
             Dict to specify the tracked KPIs.
         default_path : bool, optional
             Whether to use the default path or an absolute path in model_path and weather
+        fast_reset : bool, optional
+            Whether reset() restores the FMU state captured after initialization,
+            when supported by the FMU, by default True
+        solver : str, optional
+            Solver integrating the model-exchange interface of the FMU ('euler',
+            'rk4' or 'cvode'), by default None, i.e. co-simulation when the FMU
+            provides it
+        max_solver_step : float, optional
+            Largest internal step of the solver in seconds, by default the
+            step size
+        hold_steps : int, optional
+            Number of step sizes simulated by one step with held inputs, in
+            a single communication step of the FMU, by default 1
+        dense_output : bool, optional
+            Whether a held step samples the outputs at every step size, by
+            default False
+        history_window : int, optional
+            Number of steps kept in the output history, by default None, i.e.
+            the whole simulation
+        log_level : str, optional
+            Messages of the FMU that are logged, 'off', 'errors' or 'full',
+            by default 'full'
+        generate_forecast_seed : int or np.random.Generator, optional
+            Seed of the 'stochastic' forecasts, by default None
 
 
         Raises
@@ -96,6 +128,13 @@ class EnvModFMU(EnvFMU):
                 output_specs,
                 kpi_options,
                 default_path,
+                fast_reset=fast_reset,
+                solver=solver,
+                max_solver_step=max_solver_step,
+                hold_steps=hold_steps,
+                dense_output=dense_output,
+                history_window=history_window,
+                log_level=log_level,
             )
             self.look_for_weather_file()
         else:
@@ -116,6 +155,7 @@ class EnvModFMU(EnvFMU):
                         generate_forecasts,
                         generate_forecast_method,
                         generate_forecast_keys,
+                        generate_forecast_seed,
                     )
                 else:
                     raise Exception("Unknown weather file")
@@ -126,6 +166,7 @@ class EnvModFMU(EnvFMU):
                     generate_forecasts,
                     generate_forecast_method,
                     generate_forecast_keys,
+                    generate_forecast_seed,
                 )
 
             super().__init__(
@@ -139,6 +180,13 @@ class EnvModFMU(EnvFMU):
                 kpi_options,
                 default_path,
                 weather_file,
+                fast_reset=fast_reset,
+                solver=solver,
+                max_solver_step=max_solver_step,
+                hold_steps=hold_steps,
+                dense_output=dense_output,
+                history_window=history_window,
+                log_level=log_level,
             )
         self.init_vals = {key: init_vals[key] for key in self.input_keys}
         print("the initial variables are", self.init_vals)
@@ -196,7 +244,11 @@ class EnvModFMU(EnvFMU):
 
     def reset(self):
         super().reset()
-        self.set_model_variables(list(self.params.keys()), list(self.params.values()))
-        self.set_model_variables(
-            list(self.init_vals.keys()), list(self.init_vals.values())
-        )
+        # parameters are part of the restored state after a fast reset
+        if not self.is_fmu_initialized:
+            self.set_model_variables(
+                list(self.params.keys()), list(self.params.values())
+            )
+            self.set_model_variables(
+                list(self.init_vals.keys()), list(self.init_vals.values())
+            )
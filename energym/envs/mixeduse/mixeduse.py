@@ -404,6 +404,10 @@ class MixedUse(EnvEPlusFMU):
         generate_forecasts=True,
         generate_forecast_method="perfect",
         generate_forecast_keys=None,
+        fast_reset=True,
+        history_window=None,
+        log_level="full",
+        generate_forecast_seed=None,
     ):
         """
         Parameters
@@ -423,6 +427,17 @@ class MixedUse(EnvEPlusFMU):
             "GRC_A_Athens"
         kpi_options : dict, optional
             Dict to specify the tracked KPIs, by default None.
+        fast_reset : bool, optional
+            Whether reset() restores the FMU state captured after initialization,
+            when supported by the FMU, by default True
+        history_window : int, optional
+            Number of steps kept in the output history, by default None, i.e.
+            the whole simulation
+        log_level : str, optional
+            Messages of the FMU that are logged, 'off', 'errors' or 'full',
+            by default 'full'
+        generate_forecast_seed : int or np.random.Generator, optional
+            Seed of the 'stochastic' forecasts, by default None
         """
 
         n_steps = 4
@@ -447,4 +462,8 @@ class MixedUse(EnvEPlusFMU):
             generate_forecasts,
             generate_forecast_method,
             generate_forecast_keys,
+            fast_reset,
+            history_window,
+            log_level,
+            generate_forecast_seed,
         )
@@ -457,6 +457,14 @@ class SimpleHouse(EnvModFMU):
         generate_forecasts=True,
         generate_forecast_method="perfect",
         generate_forecast_keys=None,
+        fast_reset=True,
+        solver=None,
+        max_solver_step=None,
+        hold_steps=1,
+        dense_output=False,
+        history_window=None,
+        log_level="full",
+        generate_forecast_seed=None,
     ):
         """
         Parameters
@@ -476,6 +484,30 @@ class SimpleHouse(EnvModFMU):
             "CH_ZH_Maur"
         kpi_options : dict, optional
             Dict to specify the tracked KPIs, by default None.
+        fast_reset : bool, optional
+            Whether reset() restores the FMU state captured after initialization,
+            when supported by the FMU, by default True
+        solver : str, optional
+            Solver integrating the model-exchange interface of the FMU ('euler',
+            'rk4' or 'cvode'), by default None, i.e. co-simulation when the FMU
+            provides it
+        max_solver_step : float, optional
+            Largest internal step of the solver in seconds, by default the
+            step size
+        hold_steps : int, optional
+            Number of step sizes simulated by one step with held inputs, in
+            a single communication step of the FMU, by default 1
+        dense_output : bool, optional
+            Whether a held step samples the outputs at every step size, by
+            default False
+        history_window : int, optional
+            Number of steps kept in the output history, by default None, i.e.
+            the whole simulation
+        log_level : str, optional
+            Messages of the FMU that are logged, 'off', 'errors' or 'full',
+            by default 'full'
+        generate_forecast_seed : int or np.random.Generator, optional
+            Seed of the 'stochastic' forecasts, by default None
         """
         n_steps = 12
         step_size = 5 * 60
@@ -517,4 +549,12 @@ class SimpleHouse(EnvModFMU):
             generate_forecasts,
             generate_forecast_method,
             generate_forecast_keys,
+            fast_reset,
+            solver,
+            max_solver_step,
+            hold_steps,
+            dense_output,
+            history_window,
+            log_level,
+            generate_forecast_seed,
         )
@@ -0,0 +1,269 @@
+import os
+import time
+import json
+import shutil
+import hashlib
+import logging
+import uuid
+
+from fmpy import extract, read_model_description
+
+logger = logging.getLogger(__name__)
+
+# Cache entries that have not been used for this long are removed
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+# Only the resources folder is duplicated for every instance
+INSTANCE_FOLDERS = ["resources"]
+
+# Version of the cached model information, part of the cache key
+MODEL_INFO_VERSION = 3
+
+_file_hashes = {}
+
+
+def file_hash(path):
+    """Computes the SHA-256 digest of a file.
+
+    Digests are memoized per process and invalidated when the size or the
+    modification time of the file changes.
+
+    Parameters
+    ----------
+    path : str
+        Path to the file.
+
+    Returns
+    -------
+    str
+        Hexadecimal digest of the file content.
+    """
+    path = os.path.abspath(str(path))
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _file_hashes:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        _file_hashes[key] = sha.hexdigest()
+    return _file_hashes[key]
+
+
+def extract_cached(fmu_file, cache_dir, max_age=DEFAULT_MAX_AGE):
+    """Returns the shared extraction directory of an FMU.
+
+    The FMU is extracted at most once per content hash. The extraction is
+    done in a temporary folder which is then renamed, so that concurrent
+    processes never see a partially extracted FMU. Stale entries are
+    garbage-collected whenever a new entry is created.
+
+    Parameters
+    ----------
+    fmu_file : str
+        Path to the FMU file.
+    cache_dir : str
+        Directory holding the extracted FMUs.
+    max_age : int, optional
+        Age in seconds after which unused entries are removed, by default 30 days
+
+    Returns
+    -------
+    str
+        Path to the extracted FMU.
+    """
+    stem = os.path.splitext(os.path.basename(str(fmu_file)))[0]
+    entry = os.path.join(cache_dir, stem + "_" + file_hash(fmu_file)[:16])
+    if not os.path.isdir(entry):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_dir = os.path.join(cache_dir, ".tmp_" + uuid.uuid4().hex)
+        extract(fmu_file, unzipdir=tmp_dir)
+        try:
+            os.rename(tmp_dir, entry)
+        except OSError:
+            # another process finished the same extraction first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        gc_fmu_cache(cache_dir, max_age, keep=[entry])
+    # the modification time of an entry records its last use
+    try:
+        os.utime(entry)
+    except OSError as e:
+        logger.warning(f"Could not update cache entry {entry}. {e}")
+    return entry
+
+
+def create_instance_dir(shared_dir, instance_dir, copy_folders=()):
+    """Creates a per-instance view of an extracted FMU.
+
+    The folders listed in INSTANCE_FOLDERS are recreated with real
+    directories, so that files in them (e.g. the weather file) can be
+    replaced for one instance only. Everything else, in particular the
+    binaries, is linked to the shared extraction, unless listed in
+    copy_folders. Files are copied if the platform does not allow symbolic
+    links.
+
+    Parameters
+    ----------
+    shared_dir : str
+        Path to the shared extraction, as returned by extract_cached().
+    instance_dir : str
+        Directory to create for the instance.
+    copy_folders : list of str, optional
+        Folders copied for the instance instead of linked, by default ()
+
+    Returns
+    -------
+    str
+        Path to the instance directory.
+    """
+    os.makedirs(instance_dir, exist_ok=True)
+    for name in os.listdir(shared_dir):
+        src = os.path.join(shared_dir, name)
+        dst = os.path.join(instance_dir, name)
+        if name in copy_folders and os.path.isdir(src):
+            shutil.copytree(src, dst)
+        elif name in INSTANCE_FOLDERS and os.path.isdir(src):
+            for root, dirs, files in os.walk(src):
+                rel_root = os.path.relpath(root, src)
+                dst_root = os.path.normpath(os.path.join(dst, rel_root))
+                os.makedirs(dst_root, exist_ok=True)
+                for f in files:
+                    _link_or_copy(os.path.join(root, f), os.path.join(dst_root, f))
+        else:
+            _link_or_copy(src, dst)
+    return instance_dir
+
+
+def _link_or_copy(src, dst):
+    try:
+        os.symlink(src, dst, target_is_directory=os.path.isdir(src))
+    except OSError:
+        if os.path.isdir(src):
+            shutil.copytree(src, dst)
+        else:
+            shutil.copy(src, dst)
+
+
+def gc_fmu_cache(cache_dir, max_age=DEFAULT_MAX_AGE, keep=()):
+    """Removes cache entries that have not been used recently.
+
+    Parameters
+    ----------
+    cache_dir : str
+        Directory holding the extracted FMUs.
+    max_age : int, optional
+        Age in seconds after which unused entries are removed, by default 30 days
+    keep : list of str, optional
+        Entries that must not be removed, by default ()
+
+    Returns
+    -------
+    list of str
+        The removed entries.
+    """
+    removed = []
+    if not os.path.isdir(cache_dir):
+        return removed
+    keep = [os.path.abspath(k) for k in keep]
+    now = time.time()
+    for name in os.listdir(cache_dir):
+        entry = os.path.join(cache_dir, name)
+        if os.path.abspath(entry) in keep or not os.path.isdir(entry):
+            continue
+        try:
+            age = now - os.path.getmtime(entry)
+        except OSError:
+            continue
+        if age > max_age:
+            shutil.rmtree(entry, ignore_errors=True)
+            removed.append(entry)
+    return removed
+
+
+def load_model_info(fmu_file, cache_dir):
+    """Returns the essentials of the model description of an FMU.
+
+    The information is read from modelDescription.xml once and stored as
+    JSON in cache_dir, keyed by the FMU path, modification time and content
+    hash, so that later calls do not parse the XML again.
+
+    Parameters
+    ----------
+    fmu_file : str
+        Path to the FMU file.
+    cache_dir : str
+        Directory holding the cached model descriptions.
+
+    Returns
+    -------
+    info : dict
+        Contains "fmi_version", "fmi_type" (the preferred interface, 'cosim'
+        if available, else 'modex' or None), "guid", "interfaces" (the
+        capabilities of each interface provided by the FMU, keyed by
+        'cosim' and 'modex'), "number_of_continuous_states",
+        "number_of_event_indicators", "variables" (names, value references
+        and causalities in model order) and the sorted "inputs" and
+        "outputs".
+    """
+    path = os.path.abspath(str(fmu_file))
+    key = "{}|{}|{}|{}".format(
+        MODEL_INFO_VERSION, path, os.stat(path).st_mtime_ns, file_hash(path)
+    )
+    name = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32] + ".json"
+    cache_file = os.path.join(cache_dir, name)
+    try:
+        with open(cache_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    info = _model_info(read_model_description(path))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_file = cache_file + "." + uuid.uuid4().hex
+        with open(tmp_file, "w") as f:
+            json.dump(info, f)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not cache the model description. {e}")
+    return info
+
+
+def _interface_info(capabilities):
+    return {
+        "model_identifier": capabilities.modelIdentifier,
+        "can_get_and_set_fmu_state": bool(capabilities.canGetAndSetFMUstate),
+        "can_serialize_fmu_state": bool(capabilities.canSerializeFMUstate),
+        "can_be_instantiated_only_once_per_process": bool(
+            capabilities.canBeInstantiatedOnlyOncePerProcess
+        ),
+    }
+
+
+def _model_info(model_description):
+    interfaces = {}
+    if model_description.coSimulation is not None:
+        interfaces["cosim"] = _interface_info(model_description.coSimulation)
+    if model_description.modelExchange is not None:
+        interfaces["modex"] = _interface_info(model_description.modelExchange)
+    if "cosim" in interfaces:
+        fmi_type = "cosim"
+    elif "modex" in interfaces:
+        fmi_type = "modex"
+    else:
+        fmi_type = None
+    variables = model_description.modelVariables
+    return {
+        "fmi_version": model_description.fmiVersion,
+        "fmi_type": fmi_type,
+        "guid": model_description.guid,
+        "interfaces": interfaces,
+        "number_of_continuous_states": model_description.numberOfContinuousStates,
+        "number_of_event_indicators": model_description.numberOfEventIndicators,
+        "variables": {
+            "names": [v.name for v in variables],
+            "value_references": [v.valueReference for v in variables],
+            "causalities": [v.causality for v in variables],
+        },
+        "inputs": sorted(v.name for v in variables if v.causality == "input"),
+        "outputs": sorted(v.name for v in variables if v.causality == "output"),
+    }
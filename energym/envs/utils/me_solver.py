@@ -0,0 +1,365 @@
+import math
+from ctypes import POINTER, c_double
+
+import numpy as np
+from fmpy.fmi2 import fmi2True, fmi2False
+
+# Solvers available to integrate model-exchange FMUs
+SOLVERS = ["euler", "rk4", "cvode"]
+FIXED_STEP_SOLVERS = ["euler", "rk4"]
+# Tolerance on time comparisons, in seconds
+EPS = 1e-9
+
+
+def _pointer(array):
+    return array.ctypes.data_as(POINTER(c_double))
+
+
+class ModelExchangeStepper(object):
+    """Integrates a model-exchange FMU over communication steps.
+
+    The FMU is advanced with a fixed-step explicit method ('euler' or
+    'rk4') or with the variable-step CVode solver shipped with FMPy. Time
+    events and step events are handled where they occur. State events are
+    located by CVode, fixed-step methods handle them at the end of the
+    internal step in which the event indicators change sign. The inputs set
+    before a communication step are applied with an event iteration.
+
+    Attributes
+    ----------
+    fmu : FMU1Model or FMU2Model
+        Instantiated and initialized FMU
+    solver : str
+        Name of the solver, one of SOLVERS
+    max_step : float
+        Largest internal step of the solver in seconds
+    nx : int
+        Number of continuous states
+    nz : int
+        Number of event indicators
+    batch_integrator : FixedStepIntegrator
+        Integrator of the last batch the stepper was advanced in, if any
+
+    Methods
+    -------
+    initialize(time)
+        Enters the continuous-time mode and prepares the solver.
+    do_step(time, step_size)
+        Integrates the FMU over one communication step.
+    reset(time)
+        Restarts the solver, e.g. after the FMU state was restored.
+    """
+
+    def __init__(
+        self,
+        fmu,
+        fmi_version,
+        nx,
+        nz,
+        solver="cvode",
+        max_step=None,
+        relative_tolerance=1e-5,
+    ):
+        """
+        Parameters
+        ----------
+        fmu : FMU1Model or FMU2Model
+            Instantiated FMU, initialized before initialize() is called
+        fmi_version : str
+            '1.0' or '2.0'
+        nx : int
+            Number of continuous states
+        nz : int
+            Number of event indicators
+        solver : str, optional
+            One of 'euler', 'rk4' or 'cvode', by default 'cvode'
+        max_step : float, optional
+            Largest internal step in seconds, by default the communication
+            step size
+        relative_tolerance : float, optional
+            Relative tolerance of CVode, by default 1e-5
+
+        Raises
+        ------
+        ValueError
+            If the solver is unknown.
+        """
+        if solver not in SOLVERS:
+            raise ValueError(
+                "Unknown solver {}, must be one of {}".format(solver, SOLVERS)
+            )
+        self.fmu = fmu
+        self.is_fmi1 = fmi_version == "1.0"
+        self.nx = nx
+        self.nz = nz
+        self.solver = solver
+        self.max_step = max_step
+        self.relative_tolerance = relative_tolerance
+        self.z = np.zeros(nz)
+        self.pre_z = np.zeros(nz)
+        self._z_ptr = _pointer(self.z)
+        self._cvode = None
+        self._integrator = None
+        self.batch_integrator = None
+
+    @property
+    def is_fixed_step(self):
+        return self.solver in FIXED_STEP_SOLVERS
+
+    def initialize(self, time):
+        """Enters the continuous-time mode and prepares the solver.
+
+        Parameters
+        ----------
+        time : float
+            Current simulation time in seconds
+        """
+        if not self.is_fmi1:
+            self._update_discrete_states()
+            self.fmu.enterContinuousTimeMode()
+        self._get_event_indicators()
+        self._start_solver(time)
+
+    def _start_solver(self, time):
+        if self.solver == "cvode":
+            from fmpy.sundials import CVodeSolver
+
+            self._cvode = CVodeSolver(
+                nx=self.nx,
+                nz=self.nz,
+                get_x=self.fmu.getContinuousStates,
+                set_x=self.fmu.setContinuousStates,
+                get_dx=self.fmu.getDerivatives,
+                get_z=self.fmu.getEventIndicators,
+                set_time=self.fmu.setTime,
+                startTime=time,
+                maxStep=self.max_step if self.max_step else float("inf"),
+                relativeTolerance=self.relative_tolerance,
+            )
+
+    def reset(self, time):
+        """Restarts the solver, e.g. after the FMU state was restored.
+
+        Parameters
+        ----------
+        time : float
+            Current simulation time in seconds
+        """
+        self.fmu.setTime(time)
+        self._get_event_indicators()
+        if self._cvode is not None:
+            self._cvode.reset(time)
+
+    def close(self):
+        """Releases the solver before the FMU instance is freed."""
+        self._cvode = None
+        self._integrator = None
+        self.batch_integrator = None
+
+    def do_step(self, time, step_size):
+        """Integrates the FMU over one communication step.
+
+        Parameters
+        ----------
+        time : float
+            Current simulation time in seconds
+        step_size : float
+            Length of the communication step in seconds
+        """
+        if self.is_fixed_step:
+            if self._integrator is None:
+                self._integrator = FixedStepIntegrator([self])
+            self._integrator.do_step(time, step_size)
+        else:
+            self._handle_events(time)
+            self._integrate_cvode(time, time + step_size)
+
+    def _integrate_cvode(self, time, stop_time):
+        while time < stop_time - EPS:
+            t_next = min(stop_time, self.next_event_time())
+            if t_next - time > EPS:
+                state_event, time = self._cvode.step(time, t_next)
+            else:
+                state_event, time = False, t_next
+            time_event = time >= self.next_event_time() - EPS
+            step_event = self.completed_integrator_step(time)
+            if time_event or state_event or step_event:
+                self._handle_events(time)
+
+    def next_event_time(self):
+        """Returns the time of the next time event, or inf if there is none."""
+        info = self.fmu.eventInfo
+        if self.is_fmi1:
+            defined = info.upcomingTimeEvent != 0
+        else:
+            defined = info.nextEventTimeDefined != fmi2False
+        return info.nextEventTime if defined else math.inf
+
+    def completed_integrator_step(self, time):
+        """Sets the time after an integrator step and returns whether the
+        FMU requests an event iteration."""
+        self.fmu.setTime(time)
+        if self.is_fmi1:
+            return bool(self.fmu.completedIntegratorStep())
+        enter_event_mode, terminate = self.fmu.completedIntegratorStep()
+        if terminate != fmi2False:
+            raise Exception("The FMU terminated the simulation at t={}".format(time))
+        return enter_event_mode != fmi2False
+
+    def state_event(self):
+        """Updates the event indicators and returns whether one changed sign."""
+        if self.nz == 0:
+            return False
+        self.pre_z[:] = self.z
+        self._get_event_indicators()
+        return bool(np.any(self.pre_z * self.z < 0))
+
+    def _get_event_indicators(self):
+        if self.nz > 0:
+            self.fmu.getEventIndicators(self._z_ptr, self.nz)
+
+    def _handle_events(self, time):
+        if self.is_fmi1:
+            info = self.fmu.eventInfo
+            self.fmu.eventUpdate()
+            while info.iterationConverged == 0 and info.terminateSimulation == 0:
+                self.fmu.eventUpdate()
+            if info.terminateSimulation != 0:
+                raise Exception(
+                    "The FMU terminated the simulation at t={}".format(time)
+                )
+        else:
+            self.fmu.enterEventMode()
+            self._update_discrete_states()
+            self.fmu.enterContinuousTimeMode()
+        self._get_event_indicators()
+        if self._cvode is not None:
+            self._cvode.reset(time)
+
+    def _update_discrete_states(self):
+        info = self.fmu.eventInfo
+        info.newDiscreteStatesNeeded = fmi2True
+        info.terminateSimulation = fmi2False
+        while (
+            info.newDiscreteStatesNeeded != fmi2False
+            and info.terminateSimulation == fmi2False
+        ):
+            self.fmu.newDiscreteStates()
+        if info.terminateSimulation != fmi2False:
+            raise Exception("The FMU terminated the simulation")
+
+
+class FixedStepIntegrator(object):
+    """Integrates several model-exchange FMUs together with a fixed-step method.
+
+    The continuous states and derivatives of all FMUs are stored in one
+    contiguous vector, so that the explicit update of the states is a
+    single vectorized operation for the whole batch. The FMUs share the
+    internal step, which is shortened to the next time event of any of them.
+
+    Methods
+    -------
+    do_step(time, step_size)
+        Integrates all FMUs over one communication step.
+    """
+
+    def __init__(self, steppers):
+        """
+        Parameters
+        ----------
+        steppers : list of ModelExchangeStepper
+            Steppers using the same fixed-step solver and maximal step.
+
+        Raises
+        ------
+        ValueError
+            If the steppers do not share a fixed-step solver and max_step.
+        """
+        methods = {(s.solver, s.max_step) for s in steppers}
+        if len(methods) != 1 or not steppers[0].is_fixed_step:
+            raise ValueError("The steppers must share a fixed-step solver")
+        self.steppers = steppers
+        self.solver, self.max_step = methods.pop()
+        sizes = [s.nx for s in steppers]
+        offsets = np.cumsum([0] + sizes)
+        n_stages = 1 if self.solver == "euler" else 4
+        self.x = np.zeros(offsets[-1])
+        self.x0 = np.zeros(offsets[-1])
+        self.k = [np.zeros(offsets[-1]) for _ in range(n_stages)]
+        # pointers on the part of each FMU in the batch vectors
+        self._x_ptrs = []
+        self._k_ptrs = [[] for _ in range(n_stages)]
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            self._x_ptrs.append(_pointer(self.x[start:stop]))
+            for stage in range(n_stages):
+                self._k_ptrs[stage].append(_pointer(self.k[stage][start:stop]))
+
+    def _get_x(self):
+        for s, ptr in zip(self.steppers, self._x_ptrs):
+            if s.nx > 0:
+                s.fmu.getContinuousStates(ptr, s.nx)
+
+    def _set_x(self):
+        for s, ptr in zip(self.steppers, self._x_ptrs):
+            if s.nx > 0:
+                s.fmu.setContinuousStates(ptr, s.nx)
+
+    def _get_dx(self, stage):
+        for s, ptr in zip(self.steppers, self._k_ptrs[stage]):
+            if s.nx > 0:
+                s.fmu.getDerivatives(ptr, s.nx)
+
+    def _set_time(self, time):
+        for s in self.steppers:
+            s.fmu.setTime(time)
+
+    def _integrate(self, time, h):
+        self._get_x()
+        self._get_dx(0)
+        if self.solver == "euler":
+            self.x += h * self.k[0]
+        else:
+            k1, k2, k3, k4 = self.k
+            self.x0[:] = self.x
+            np.add(self.x0, 0.5 * h * k1, out=self.x)
+            self._set_time(time + 0.5 * h)
+            self._set_x()
+            self._get_dx(1)
+            np.add(self.x0, 0.5 * h * k2, out=self.x)
+            self._set_x()
+            self._get_dx(2)
+            np.add(self.x0, h * k3, out=self.x)
+            self._set_time(time + h)
+            self._set_x()
+            self._get_dx(3)
+            np.add(self.x0, h / 6.0 * (k1 + 2.0 * k2 + 2.0 * k3 + k4), out=self.x)
+        self._set_x()
+
+    def do_step(self, time, step_size):
+        """Integrates all FMUs over one communication step.
+
+        Parameters
+        ----------
+        time : float
+            Current simulation time of all FMUs in seconds
+        step_size : float
+            Length of the communication step in seconds
+        """
+        stop_time = time + step_size
+        max_step = self.max_step if self.max_step else step_size
+        for s in self.steppers:
+            s._handle_events(time)
+        while time < stop_time - EPS:
+            t_next = min(
+                time + max_step,
+                stop_time,
+                min(s.next_event_time() for s in self.steppers),
+            )
+            if t_next - time > EPS:
+                self._integrate(time, t_next - time)
+            time = t_next
+            for s in self.steppers:
+                time_event = time >= s.next_event_time() - EPS
+                step_event = s.completed_integrator_step(time)
+                if time_event or s.state_event() or step_event:
+                    s._handle_events(time)
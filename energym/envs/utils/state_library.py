@@ -0,0 +1,103 @@
+import os
+import pickle
+import logging
+
+from energym.envs.utils.fmu_cache import file_hash
+
+logger = logging.getLogger(__name__)
+
+# Extension of the snapshot files, named after their simulation time
+SNAPSHOT_EXTENSION = ".fmustate"
+
+
+def state_library_dir(library_path, guid, weather_file):
+    """Returns the folder of the snapshots of a model with a weather file.
+
+    The folder is keyed by the GUID of the FMU and the content of the
+    weather file, so that a weather file edited or replaced under the same
+    name does not share the snapshots of the former one.
+
+    Parameters
+    ----------
+    library_path : str
+        Root folder of the state library.
+    guid : str
+        GUID of the FMU.
+    weather_file : str
+        Path to the weather file used by the simulation.
+
+    Returns
+    -------
+    str
+        Folder of the snapshots.
+    """
+    stem = os.path.splitext(os.path.basename(str(weather_file)))[0]
+    weather_name = "{}_{}".format(stem, file_hash(weather_file)[:16])
+    guid = guid.strip("{}")
+    return os.path.join(library_path, guid, weather_name)
+
+
+def write_snapshot(directory, time, fmu_state, output_values):
+    """Writes a snapshot of a simulation to the state library.
+
+    The snapshot is written to a temporary file which is then renamed, so
+    that readers never see a partial snapshot.
+
+    Parameters
+    ----------
+    directory : str
+        Folder of the snapshots, see state_library_dir().
+    time : float
+        Simulation time of the snapshot in seconds.
+    fmu_state : bytes
+        Serialized FMU state.
+    output_values : np.ndarray
+        Outputs of the step that ended at the snapshot time.
+
+    Returns
+    -------
+    str
+        Path of the snapshot file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, str(int(time)) + SNAPSHOT_EXTENSION)
+    data = {"time": time, "fmu_state": fmu_state, "output_values": output_values}
+    with open(path + ".tmp", "wb") as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def find_snapshot(directory, time):
+    """Finds the latest snapshot at or before a simulation time.
+
+    Parameters
+    ----------
+    directory : str
+        Folder of the snapshots, see state_library_dir().
+    time : float
+        Simulation time in seconds.
+
+    Returns
+    -------
+    dict or None
+        The snapshot with the keys 'time', 'fmu_state' and 'output_values',
+        None if there is no snapshot before the time.
+    """
+    if not os.path.isdir(directory):
+        return None
+    times = []
+    for name in os.listdir(directory):
+        stem, extension = os.path.splitext(name)
+        if extension == SNAPSHOT_EXTENSION and stem.isdigit():
+            times.append(int(stem))
+    times = [t for t in times if t <= time]
+    if not times:
+        return None
+    path = os.path.join(directory, str(max(times)) + SNAPSHOT_EXTENSION)
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError) as e:
+        logger.warning(f"Snapshot {path} could not be read. {e}")
+        return None
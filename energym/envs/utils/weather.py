@@ -1,11 +1,24 @@
-import pandas as pd
+import os
+import io
 import csv
-import random
-import math
+import json
+import uuid
 import logging
+import zipfile
+from os.path import expanduser
+
+import numpy as np
+import pandas as pd
+
+from energym.envs.utils.fmu_cache import file_hash
 
 logger = logging.getLogger(__name__)
 
+# Folder of the parsed weather files, keyed by the hash of their content
+WEATHER_CACHE_DIR = os.path.join(expanduser("~"), "Energym_runs", "weather_cache")
+# Version of the cached weather data, part of the cache key
+WEATHER_CACHE_VERSION = 1
+
 default_keys = ["Dry Bulb Temperature", "Direct Normal Radiation"]
 translate_dictionary_Eplus = {
     "Dry Bulb Temperature Prediction": "Ext_T",
@@ -33,6 +46,9 @@ class Weather:
         List of observed weather indicators.
     delimiter : str
         Separation character in the file.
+    cache_dir : str
+        Folder of the parsed weather files, None to parse the file at
+        every read.
 
     Methods
     -------
@@ -42,7 +58,7 @@ class Weather:
         Closes the data of the current weather file.
     """
 
-    def __init__(self, names, delimiter):
+    def __init__(self, names, delimiter, cache_dir=WEATHER_CACHE_DIR):
         """
         Parameters
         ----------
@@ -50,11 +66,15 @@ class Weather:
             List of observed weather indicators.
         delimiter : str
             Separation character in the file.
+        cache_dir : str, optional
+            Folder of the parsed weather files, by default
+            ~/Energym_runs/weather_cache. None disables the cache.
         """
         self.headers = {}
         self.dataframe = pd.DataFrame()
         self.names = names
         self.delimiter = delimiter
+        self.cache_dir = cache_dir
 
     def read(
             self,
@@ -62,6 +82,8 @@ class Weather:
             generate_forecasts=True,
             generate_forecast_method="perfect",
             generate_forecast_keys=None,
+            generate_forecast_seed=None,
+            n_members=None,
     ):
         """Reads a weather file. Generates associated forecasts if asked
 
@@ -76,21 +98,33 @@ class Weather:
             If 'persistence', persitence forecast from previous day
         generate_forecast_keys: list, optional
             List of keys to generate forecast for. By default is ["Dry Bulb Temperature", "Global Horizontal Radiation"]
+        generate_forecast_seed: int or np.random.Generator, optional
+            Seed or generator of the random numbers of the 'stochastic'
+            forecasts, by default None, i.e. fresh entropy from the OS
+        n_members: int, optional
+            Number of forecast members generated at once, by default None,
+            i.e. the members are generated when they are first requested
         """
-        self.headers = self._read_headers(fp)
-        self.dataframe = self._read_data(fp)
+        self.headers, self.dataframe = self._load(fp)
         if generate_forecast_keys is None:
             generate_forecast_keys = default_keys
         if generate_forecasts:
+            rng = np.random.default_rng(generate_forecast_seed)
             self.prediction_df = self._get_prediction_df(
-                generate_forecast_keys, generate_forecast_method
+                generate_forecast_keys, generate_forecast_method, rng
             )
             self.forecast_keys = [
                 k + " Prediction" for k in generate_forecast_keys
             ]
+            self._forecast_method = generate_forecast_method
+            self._forecast_sources = list(generate_forecast_keys)
+            self._rng = rng
+            self._build_forecast_index()
+            if n_members is not None:
+                self._get_members(n_members)
 
-    def _read_headers(self, fp):
-        """Reads the headers of a weather file.
+    def _load(self, fp):
+        """Loads a weather file from the cache, or parses and caches it.
 
         Parameters
         ----------
@@ -99,23 +133,35 @@ class Weather:
 
         Returns
         -------
-        d : dict
+        headers : dict
             A dictionary containing the header rows.
+        df : pd.DataFrame
+            A DataFrame containing the climate data.
         """
-        d = {}
-        with open(fp, newline="") as csvfile:
-            csvreader = csv.reader(
-                csvfile, delimiter=self.delimiter, quotechar='"'
-            )
-            for row in csvreader:
-                if row[0].replace(".", "", 1).isdigit():
-                    break
-                else:
-                    d[row[0]] = row[1:]
-        return d
+        if self.cache_dir is None:
+            return self._parse(fp)
+        stem = os.path.splitext(os.path.basename(str(fp)))[0]
+        cache_file = os.path.join(
+            self.cache_dir,
+            "{}_{}_v{}.npz".format(stem, file_hash(fp)[:16], WEATHER_CACHE_VERSION),
+        )
+        if os.path.isfile(cache_file):
+            try:
+                return self._read_cache(cache_file)
+            except (OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+                logger.warning(f"Cached weather {cache_file} could not be read. {e}")
+        headers, df = self._parse(fp)
+        try:
+            self._write_cache(cache_file, headers, df)
+        except OSError as e:
+            logger.warning(f"Weather {fp} could not be cached. {e}")
+        return headers, df
+
+    def _parse(self, fp):
+        """Parses a weather file, which is read once.
 
-    def _read_data(self, fp):
-        """Reads the climate data of a weather file.
+        The header rows are the rows before the first one starting with a
+        number, the climate data follows them.
 
         Parameters
         ----------
@@ -124,89 +170,211 @@ class Weather:
 
         Returns
         -------
+        headers : dict
+            A dictionary containing the header rows.
         df : pd.DataFrame
             A DataFrame containing the climate data.
         """
-        first_row = self._first_row_with_climate_data(fp)
         with open(fp, newline="") as csvfile:
-            df = pd.read_csv(
-                csvfile,
-                delimiter=self.delimiter,
-                skiprows=first_row,
-                header=None,
-                names=self.names,
-                index_col=False,
+            text = csvfile.read()
+        headers = {}
+        first_row = 0
+        csvreader = csv.reader(
+            io.StringIO(text), delimiter=self.delimiter, quotechar='"'
+        )
+        for row in csvreader:
+            if row[0].replace(".", "", 1).isdigit():
+                break
+            headers[row[0]] = row[1:]
+            first_row += 1
+        df = pd.read_csv(
+            io.StringIO(text),
+            delimiter=self.delimiter,
+            skiprows=first_row,
+            header=None,
+            names=self.names,
+            index_col=False,
+        )
+        return self._process_headers(headers), df
+
+    def _process_headers(self, headers):
+        """Post-processes the header rows of a weather file.
+
+        Parameters
+        ----------
+        headers : dict
+            The header rows keyed by their first field.
+
+        Returns
+        -------
+        dict
+            A dictionary containing the header rows.
+        """
+        return headers
+
+    def _write_cache(self, cache_file, headers, df):
+        """Writes the parsed weather data to the cache.
+
+        The numeric columns are stored as one float64 matrix and the text
+        columns as one unicode matrix, along with a JSON header holding the
+        header rows, the column names and their dtypes. The file is written
+        to a temporary file which is then renamed, so that readers never
+        see a partial file.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        numeric_columns = [
+            name for name in df.columns if pd.api.types.is_numeric_dtype(df[name])
+        ]
+        text_columns = [name for name in df.columns if name not in numeric_columns]
+        meta = {
+            "headers": headers,
+            "columns": list(df.columns),
+            "dtypes": {name: str(df[name].dtype) for name in numeric_columns},
+        }
+        tmp_file = cache_file + "." + uuid.uuid4().hex
+        with open(tmp_file, "wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                numeric=df[numeric_columns].to_numpy(dtype=np.float64),
+                text=df[text_columns].to_numpy().astype(str),
             )
-        return df
+        os.replace(tmp_file, cache_file)
+
+    def _read_cache(self, cache_file):
+        """Reads weather data written by _write_cache()."""
+        with np.load(cache_file, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            numeric = data["numeric"]
+            text = data["text"]
+        dtypes = meta["dtypes"]
+        columns = {}
+        i_numeric = i_text = 0
+        for name in meta["columns"]:
+            if name in dtypes:
+                columns[name] = numeric[:, i_numeric].astype(dtypes[name])
+                i_numeric += 1
+            else:
+                columns[name] = text[:, i_text].astype(object)
+                i_text += 1
+        return meta["headers"], pd.DataFrame(columns)
 
-    def _first_row_with_climate_data(self, fp):
-        """Finds the first row with the climate data of a weather file.
+    def _build_forecast_index(self):
+        """Stores the forecasts as an array with one row per forecast key."""
+        values = self.prediction_df[self.forecast_keys].to_numpy(dtype=np.float64)
+        self._forecasts = self._prepare_forecasts(np.array(values.T, order="C"))
+        self._members = None
+
+    def _prepare_forecasts(self, values):
+        """Brings forecasts to the layout read by get_forecast().
 
         Parameters
         ----------
-        fp : str
-            The path to the file.
+        values : np.ndarray
+            Forecasts with the forecast keys along the first axis and the
+            rows of the weather data along the last axis.
 
         Returns
         -------
-        i : int
-            The row number.
+        np.ndarray
+            The forecasts, possibly modified in place.
         """
-        with open(fp, newline="") as csvfile:
-            csvreader = csv.reader(
-                csvfile, delimiter=self.delimiter, quotechar='"'
+        return values
+
+    def _get_members(self, n_members):
+        """Returns the members of the forecast ensemble.
+
+        Stochastic members are generated in one pass for all the members
+        that are not cached yet. They continue the random numbers of the
+        seed, so a seeded ensemble is reproducible when the members are
+        requested in the same order, e.g. all at once by read(). The
+        members of the other methods are all the forecast itself.
+
+        Parameters
+        ----------
+        n_members : int
+            Smallest number of members.
+
+        Returns
+        -------
+        np.ndarray
+            Members with the forecast keys along the first axis and the
+            members along the second axis.
+
+        Raises
+        ------
+        ValueError
+            If n_members is smaller than 1.
+        """
+        if n_members < 1:
+            raise ValueError("n_members must be at least 1, got {}".format(n_members))
+        if self._forecast_method != "stochastic":
+            n_keys, length = self._forecasts.shape
+            return np.broadcast_to(
+                self._forecasts[:, None, :], (n_keys, n_members, length)
             )
-            for i, row in enumerate(csvreader):
-                if row[0].replace(".", "", 1).isdigit():
-                    break
-        return i
-
-    def _get_extrema(self, key):
-        extr = self.dataframe.copy()
-        extr["min"] = self.dataframe[key][
-            (self.dataframe[key].shift(1) > self.dataframe[key])
-            & (self.dataframe[key].shift(-1) > self.dataframe[key])
-            ]
-        extr["max"] = self.dataframe[key][
-            (self.dataframe[key].shift(1) < self.dataframe[key])
-            & (self.dataframe[key].shift(-1) < self.dataframe[key])
-            ]
-        return extr
-
-    def _generate_prediction_sequence(self, key):
-        df = self._get_extrema(key)
-        df[key + " Prediction"] = 0.0
-        last_ind = 0
-        last_rate = random.uniform(0.8, 1.2)
-        new_ind = 0
-        for ind in df.index:
-            if not math.isnan(df["min"][ind]):
-                new_ind = ind
-            elif not math.isnan(df["max"][ind]):
-                new_ind = ind
-            if last_ind != new_ind:
-                new_rate = random.uniform(0.85, 1.15)
-                dist = new_ind - last_ind
-                for interm in range(last_ind, new_ind):
-                    df.loc[interm, (key + " Prediction",)] = df[key][
-                                                                 interm
-                                                             ] * (
-                                                                     (new_ind - interm) / dist * last_rate
-                                                                     + (interm - last_ind) / dist * new_rate
-                                                             )
-                last_ind = new_ind
-        new_ind = df.index[-1]
-        new_rate = random.uniform(0.85, 1.15)
-        df.loc[new_ind, (key + " Prediction",)] = (
-                df[key][new_ind] * new_rate
-        )
-        dist = new_ind - last_ind
-        for interm in range(last_ind, new_ind):
-            df.loc[interm, (key + " Prediction",)] = df[key][interm] * (
-                    (new_ind - interm) / dist * last_rate
-                    + (interm - last_ind) / dist * new_rate
+        n_cached = 0 if self._members is None else self._members.shape[1]
+        if n_members > n_cached:
+            members = np.stack(
+                [
+                    self._generate_prediction_sequence(
+                        key, self._rng, n_members - n_cached
+                    )
+                    for key in self._forecast_sources
+                ]
             )
-        return df
+            members = self._prepare_forecasts(members)
+            if self._members is not None:
+                members = np.concatenate([self._members, members], axis=1)
+            self._members = members
+        return self._members
+
+    def _generate_prediction_sequence(self, key, rng, n_members=None):
+        """Generates a stochastic forecast of a weather indicator.
+
+        The forecast is the weather multiplied by a random rate. The rate
+        is drawn at the start, at every local extremum and at the end of
+        the year, and interpolated linearly in between.
+
+        Parameters
+        ----------
+        key : str
+            Name of the weather indicator.
+        rng : np.random.Generator
+            Generator of the random rates.
+        n_members : int, optional
+            Number of independent forecasts, by default None, i.e. a
+            single one
+
+        Returns
+        -------
+        np.ndarray
+            The forecast, one value per row of the weather data, with a
+            leading axis of n_members if given.
+        """
+        values = self.dataframe[key].to_numpy(dtype=np.float64)
+        n = len(values)
+        inner = values[1:-1]
+        extrema = (
+            ((inner < values[:-2]) & (inner < values[2:]))
+            | ((inner > values[:-2]) & (inner > values[2:]))
+        ).nonzero()[0] + 1
+        knots = np.unique(np.concatenate(([0], extrema, [n - 1])))
+        size = () if n_members is None else (n_members,)
+        rates = np.concatenate(
+            (
+                rng.uniform(0.8, 1.2, size + (1,)),
+                rng.uniform(0.85, 1.15, size + (len(knots) - 1,)),
+            ),
+            axis=-1,
+        )
+        # Segment of every row and its position between the two knots
+        position = np.interp(np.arange(n), knots, np.arange(len(knots)))
+        segments = np.minimum(position.astype(np.int64), len(knots) - 2)
+        weights = position - segments
+        return values * (
+            (1 - weights) * rates[..., segments] + weights * rates[..., segments + 1]
+        )
 
     def close(self):
         """Closes the data of the current weather file."""
@@ -225,8 +393,13 @@ class EPW(Weather):
         Provides a weather forecast for a requested length and requested keys.
     """
 
-    def __init__(self):
-        """"""
+    def __init__(self, cache_dir=WEATHER_CACHE_DIR):
+        """
+        Parameters
+        ----------
+        cache_dir : str, optional
+            Folder of the parsed weather files, None disables the cache.
+        """
         names = [
             "Year",
             "Month",
@@ -264,19 +437,15 @@ class EPW(Weather):
             "Liquid Precipitation Depth",
             "Liquid Precipitation Quantity",
         ]
-        super().__init__(names, ",")
+        super().__init__(names, ",", cache_dir)
 
-    def _get_prediction_df(self, keylist, method):
-        df_list = [
-            self.dataframe["Month"],
-            self.dataframe["Day"],
-            self.dataframe["Hour"],
-        ]
+    def _get_prediction_df(self, keylist, method, rng):
         if method == "stochastic":
+            pred_df = self.dataframe[["Month", "Day", "Hour"]].copy()
             for key in keylist:
-                df = self._generate_prediction_sequence(key)
-                df_list.append(df[key + " Prediction"])
-            pred_df = pd.concat(df_list, axis=1)
+                pred_df[key + " Prediction"] = self._generate_prediction_sequence(
+                    key, rng
+                )
         elif method == "perfect":
             pred_df = self.dataframe[
                 ["Month", "Day", "Hour"] + keylist
@@ -297,7 +466,30 @@ class EPW(Weather):
             )
         return pred_df
 
-    def get_forecast(self, hour, day, month, forecast_length):
+    def _build_forecast_index(self):
+        """Stores the forecasts and the row of every (month, day, hour).
+
+        The year is repeated twice, so that forecast windows running over
+        the end of the year are slices of the forecast array as well.
+        """
+        super()._build_forecast_index()
+        keys = self._date_key(
+            self.prediction_df["Month"].to_numpy(),
+            self.prediction_df["Day"].to_numpy(),
+            self.prediction_df["Hour"].to_numpy(),
+        )
+        unique_keys, first_rows = np.unique(keys, return_index=True)
+        self._rows = np.full(self._date_key(12, 31, 24) + 1, -1, dtype=np.int64)
+        self._rows[unique_keys] = first_rows
+
+    def _prepare_forecasts(self, values):
+        return np.concatenate([values, values], axis=-1)
+
+    @staticmethod
+    def _date_key(month, day, hour):
+        return (month * 32 + day) * 25 + hour
+
+    def get_forecast(self, hour, day, month, forecast_length, n_members=None):
         """Provides a weather forecast for a requested length and requested keys.
 
         Parameters
@@ -310,18 +502,23 @@ class EPW(Weather):
             Current month.
         forecast_length : int
             Number of forecasted hours.
+        n_members : int, optional
+            Number of members of a forecast ensemble, by default None, i.e.
+            a single forecast
 
         Returns
         -------
         forecast : dict
-            Containing a forecast of the requested length for the requested keys.
+            Containing a forecast of the requested length for the requested
+            keys, as views on the forecast array, of shape (n_members,
+            forecast_length) if n_members is given.
 
         Raises
         ------
         Exception
             If no weather file has been loaded.
         Exception
-            If the weather file has a non-standard format.
+            If the weather file has no data for the date.
         """
         change_ind = False
         if hour == 0:
@@ -331,48 +528,27 @@ class EPW(Weather):
         length = len(self.prediction_df)
         if length == 0:
             raise Exception("No weather file")
-        try:
-            date_bool_array = (
-                    (self.prediction_df["Month"] == month)
-                    & (self.prediction_df["Day"] == day)
-                    & (self.prediction_df["Hour"] == hour)
+        index = self._rows[self._date_key(month, day, hour)]
+        if index < 0:
+            raise Exception(
+                "No weather data for month {}, day {}, hour {}".format(
+                    month, day, hour
+                )
             )
-        except BaseException as e:
-            logger.exception(f"Wrong weather file format. {e}")
-        prediction_keys = self.forecast_keys
-        index = [i for i, val in enumerate(date_bool_array) if val][0]
         if change_ind:
             if day > 1 or month > 1:
                 index = index - 1
             else:
                 index = length - 1
-        if index + forecast_length > length:
-            rest = forecast_length - length + index
-            day_slice = pd.concat(
-                [
-                    self.prediction_df.iloc[index:length],
-                    self.prediction_df.iloc[0:rest],
-                ]
-            ).to_dict()
-        else:
-            day_slice = self.prediction_df.iloc[
-                        index: index + forecast_length
-                        ].to_dict()
-        del_keys = [
-            key for key in day_slice if key not in prediction_keys
-        ]
-        for key in del_keys:
-            del day_slice[key]
-        for key in day_slice:
-            day_slice[key] = list(day_slice[key].values())
+        forecasts = self._forecasts
+        if n_members is not None:
+            forecasts = self._get_members(n_members)[:, :n_members]
+        window = forecasts[..., index : index + forecast_length]
 
         # Carry out translation to standard name so as to have same naming as FMU outputs
         forecast = {}
-        for key in day_slice:
-            if key in list(translate_dictionary_Eplus):
-                forecast[translate_dictionary_Eplus[key]] = day_slice[key]
-            else:
-                forecast[key] = day_slice[key]
+        for key, values in zip(self.forecast_keys, window):
+            forecast[translate_dictionary_Eplus.get(key, key)] = values
         return forecast
 
 
@@ -387,7 +563,13 @@ class MOS(Weather):
         Provides a weather forecast for a requested length and requested keys.
     """
 
-    def __init__(self):
+    def __init__(self, cache_dir=WEATHER_CACHE_DIR):
+        """
+        Parameters
+        ----------
+        cache_dir : str, optional
+            Folder of the parsed weather files, None disables the cache.
+        """
         names = [
             "Time",
             "Dry Bulb Temperature",
@@ -420,22 +602,21 @@ class MOS(Weather):
             "Liquid Precipitation Depth",
             "Liquid Precipitation Quantity",
         ]
-        super().__init__(names, "\t")
+        super().__init__(names, "\t", cache_dir)
 
-    def _read_headers(self, fp):
-        """Reads the headers of a MOS weather file. Overrides parent method because headers are different from rest
+    def _process_headers(self, d0):
+        """Processes the headers of a MOS weather file. Overrides parent method because headers are different from rest
 
         Parameters
         ----------
-        fp : str
-            The path to the file.
+        d0 : dict
+            The header rows keyed by their first field.
 
         Returns
         -------
         d1 : dict
             A dictionary containing the header rows.
         """
-        d0 = super()._read_headers(fp)
         d1 = {}
         for k, v in d0.items():
             if k.startswith("#"):
@@ -451,6 +632,8 @@ class MOS(Weather):
             generate_forecasts=True,
             generate_forecast_method="perfect",
             generate_forecast_keys=None,
+            generate_forecast_seed=None,
+            n_members=None,
     ):
         """Reads a weather file from MOS.
 
@@ -466,17 +649,37 @@ class MOS(Weather):
             generate_forecasts,
             generate_forecast_method,
             generate_forecast_keys,
+            generate_forecast_seed,
+            n_members,
         )
         self.prediction_df.index = self.prediction_df["Time"]
         self.dataframe.index = self.dataframe["Time"]
 
-    def _get_prediction_df(self, keylist, method):
-        df_list = [self.dataframe["Time"]]
+    def _build_forecast_index(self):
+        """Stores the forecasts under the names of the FMU outputs.
+
+        Temperatures are converted to Kelvin once, as the FMU outputs are.
+        """
+        self._times = self.prediction_df["Time"].to_numpy(dtype=np.float64)
+        # Carry out translation to standard name so as to have same naming as FMU outputs
+        self._forecast_names = [
+            translate_dictionary_Mod.get(key, key) for key in self.forecast_keys
+        ]
+        super()._build_forecast_index()
+
+    def _prepare_forecasts(self, values):
+        for name, key_values in zip(self._forecast_names, values):
+            if ".T" in name:
+                key_values += 273.15
+        return values
+
+    def _get_prediction_df(self, keylist, method, rng):
         if method == "stochastic":
+            pred_df = self.dataframe[["Time"]].copy()
             for key in keylist:
-                df = self._generate_prediction_sequence(key)
-                df_list.append(df[key + " Prediction"])
-            pred_df = pd.concat(df_list, axis=1)
+                pred_df[key + " Prediction"] = self._generate_prediction_sequence(
+                    key, rng
+                )
         elif method == "perfect":
             pred_df = self.dataframe[["Time"] + keylist].copy()
             pred_df.rename(
@@ -495,7 +698,7 @@ class MOS(Weather):
             )
         return pred_df
 
-    def get_forecast(self, time, forecast_length):
+    def get_forecast(self, time, forecast_length, n_members=None):
         """Returns a forecast for the next forecast_length hours.
 
         Parameters
@@ -504,11 +707,16 @@ class MOS(Weather):
             Start time of forecast
         forecast_length : int
             Forecast length in hours
+        n_members : int, optional
+            Number of members of a forecast ensemble, by default None, i.e.
+            a single forecast
 
         Returns
         -------
         forecast : dict
-            Containing a forecast of the requested length for the requested keys.
+            Containing a forecast of the requested length for the requested
+            keys, as views on the forecast array, of shape (n_members,
+            forecast_length) if n_members is given.
 
         Raises
         ------
@@ -518,28 +726,26 @@ class MOS(Weather):
         length = len(self.prediction_df)
         if length == 0:
             raise Exception("No weather file")
-        prediction_keys = self.forecast_keys
-
-        if time not in self.prediction_df.index:
+        index = np.searchsorted(self._times, time)
+        if index == length or self._times[index] != time:
             logger.warning(
                 "Start of forecast is not in weather file index. using closest time"
             )
-            time = self.prediction_df.index[
-                (self.prediction_df["Time"] - time).abs().argsort()[0]
-            ]
-
-        day_slice = self.prediction_df.loc[
-                   time: time + 3600 * (forecast_length - 1), prediction_keys
-                   ].to_dict(orient="list")
+            if index == length or (
+                index > 0
+                and time - self._times[index - 1] <= self._times[index] - time
+            ):
+                index = index - 1
+        stop = np.searchsorted(
+            self._times,
+            self._times[index] + 3600 * (forecast_length - 1),
+            side="right",
+        )
 
-        # Carry out translation to standard name so as to have same naming as FMU outputs
+        forecasts = self._forecasts
+        if n_members is not None:
+            forecasts = self._get_members(n_members)[:, :n_members]
         forecast = {}
-        for key in day_slice:
-            if key in list(translate_dictionary_Mod):
-                forecast[translate_dictionary_Mod[key]] = day_slice[key]
-            else:
-                forecast[key] = day_slice[key]
-        for key in forecast:
-            if ".T" in key:
-                forecast[key] = [val + 273.15 for val in forecast[key]]
+        for name, values in zip(self._forecast_names, forecasts):
+            forecast[name] = values[..., index:stop]
         return forecast
@@ -0,0 +1,322 @@
+import logging
+import random
+import traceback
+import multiprocessing as mp
+from multiprocessing import shared_memory, resource_tracker
+
+import numpy as np
+
+from energym.spaces.utils import split_seed
+
+logger = logging.getLogger(__name__)
+
+
+def _worker(key, index, seed, kwargs, pipe):
+    """Hosts one environment and serves the commands of a VectorEnv.
+
+    Inputs and outputs are exchanged through the shared memory blocks
+    announced by the parent process, only the commands go through the pipe.
+    """
+    from energym.factory import make
+
+    env = None
+    blocks = []
+    try:
+        np.random.seed(seed)
+        random.seed(seed)
+        env = make(key, **kwargs)
+        if env is None:
+            raise Exception("Unable to build environment {}".format(key))
+        input_seed, output_seed = split_seed(seed, 2)
+        env.input_space.seed(input_seed)
+        env.output_space.seed(output_seed)
+        pipe.send(("ok", (env.get_inputs_names(), env.get_outputs_names())))
+
+        command, args = pipe.recv()
+        if command != "attach":
+            return
+        names, n_envs = args
+        blocks = [shared_memory.SharedMemory(name=name) for name in names]
+        n_inputs = len(env.get_inputs_names())
+        n_outputs = len(env.get_outputs_names())
+        actions = np.ndarray((n_envs, n_inputs), np.float64, blocks[0].buf)[index]
+        observations = np.ndarray((n_envs, n_outputs), np.float64, blocks[1].buf)[
+            index
+        ]
+        times = np.ndarray((n_envs,), np.float64, blocks[2].buf)
+        dones = np.ndarray((n_envs,), np.bool_, blocks[3].buf)
+
+        def write_output():
+            output = env.get_output()
+            observations[:] = [output[key] for key in env.get_outputs_names()]
+            times[index] = env.time
+
+        write_output()
+        pipe.send(("ok", None))
+
+        while True:
+            command, args = pipe.recv()
+            if command == "step":
+                observations[:] = env.step_array(actions)
+                times[index] = env.time
+                dones[index] = env.time >= env.stop_time
+                if dones[index]:
+                    env.reset()
+                pipe.send(("ok", None))
+            elif command == "reset":
+                env.reset()
+                write_output()
+                dones[index] = False
+                pipe.send(("ok", None))
+            elif command == "get_forecast":
+                pipe.send(("ok", env.get_forecast(*args)))
+            elif command == "get_kpi":
+                pipe.send(("ok", env.get_kpi(*args)))
+            elif command == "close":
+                break
+            else:
+                raise Exception("Unknown command {}".format(command))
+    except BaseException:
+        pipe.send(("error", traceback.format_exc()))
+    finally:
+        if env is not None:
+            try:
+                env.close()
+            except BaseException as e:
+                logger.error(f"Environment {index} could not be closed. {e}")
+        # the views on the blocks must be released before closing them
+        actions = observations = times = dones = None
+        for block in blocks:
+            block.close()
+        pipe.close()
+
+
+class VectorEnv(object):
+    """Runs several copies of an environment in worker processes.
+
+    Every worker hosts one environment created with energym.make(). Actions
+    and observations are exchanged as numpy arrays through shared memory,
+    one row per environment, in the order of get_inputs_names() and
+    get_outputs_names(). An environment that reaches its stop time is reset
+    automatically after the step.
+
+    The module is not imported by energym itself, since shared memory needs
+    Python 3.8 or later. Import it with
+    ``from energym.envs.vector_env import VectorEnv``.
+
+    Attributes
+    ----------
+    num_envs : int
+        Number of environments.
+    input_keys : list of str
+        Names of the inputs, i.e. the columns of the actions.
+    output_keys : list of str
+        Names of the outputs, i.e. the columns of the observations.
+    actions : np.ndarray
+        Shared array of shape (num_envs, number of inputs).
+    observations : np.ndarray
+        Shared array of shape (num_envs, number of outputs).
+    times : np.ndarray
+        Shared array with the simulation time of each environment.
+    dones : np.ndarray
+        Shared array flagging the environments that were reset at the
+        last step.
+
+    Methods
+    -------
+    step(actions)
+        Advances all environments one timestep.
+    reset()
+        Resets all environments.
+    get_forecast(forecast_length=24)
+        Gets the weather forecasts of all environments.
+    get_kpi(start_ind=0, end_ind=-1)
+        Gets the KPIs of all environments.
+    close()
+        Closes the environments and stops the workers.
+    """
+
+    def __init__(self, key, num_envs, seed=None, start_method=None, **kwargs):
+        """
+        Parameters
+        ----------
+        key : str
+            Name of the simulation model, as for energym.make().
+        num_envs : int
+            Number of environments.
+        seed : int, optional
+            Seed from which the seeds of the workers are derived, by default
+            None (non deterministic)
+        start_method : str, optional
+            Start method of the worker processes ('fork', 'spawn' or
+            'forkserver'), by default the platform default
+        **kwargs
+            Arguments passed to energym.make().
+
+        Raises
+        ------
+        Exception
+            If an environment cannot be created.
+        """
+        self.num_envs = num_envs
+        self.closed = False
+        self._blocks = []
+        self._processes = []
+        self._pipes = []
+        seeds = [
+            int(s.generate_state(1)[0])
+            for s in np.random.SeedSequence(seed).spawn(num_envs)
+        ]
+        ctx = mp.get_context(start_method)
+        # the workers must share the resource tracker of the parent, otherwise
+        # their own trackers would unlink the shared memory when they exit
+        resource_tracker.ensure_running()
+        for index in range(num_envs):
+            parent_pipe, child_pipe = ctx.Pipe()
+            process = ctx.Process(
+                target=_worker,
+                args=(key, index, seeds[index], kwargs, child_pipe),
+                daemon=True,
+            )
+            process.start()
+            child_pipe.close()
+            self._pipes.append(parent_pipe)
+            self._processes.append(process)
+
+        try:
+            self.input_keys, self.output_keys = self._receive_all()[0]
+            shapes = [
+                (num_envs, len(self.input_keys)),
+                (num_envs, len(self.output_keys)),
+                (num_envs,),
+                (num_envs,),
+            ]
+            dtypes = [np.float64, np.float64, np.float64, np.bool_]
+            arrays = []
+            for shape, dtype in zip(shapes, dtypes):
+                size = max(int(np.prod(shape)) * np.dtype(dtype).itemsize, 1)
+                block = shared_memory.SharedMemory(create=True, size=size)
+                self._blocks.append(block)
+                arrays.append(np.ndarray(shape, dtype, block.buf))
+            self.actions, self.observations, self.times, self.dones = arrays
+            self.dones[:] = False
+            names = [block.name for block in self._blocks]
+            self._call_all("attach", names, num_envs)
+        except BaseException:
+            self.close()
+            raise
+
+    def _receive_all(self):
+        results = []
+        errors = []
+        for index, pipe in enumerate(self._pipes):
+            status, result = pipe.recv()
+            if status == "error":
+                errors.append("Environment {}: {}".format(index, result))
+            results.append(result)
+        if errors:
+            raise Exception("\n".join(errors))
+        return results
+
+    def _call_all(self, command, *args):
+        for pipe in self._pipes:
+            pipe.send((command, args))
+        return self._receive_all()
+
+    def get_inputs_names(self):
+        """Retrieves the list of inputs, i.e. the columns of the actions."""
+        return self.input_keys
+
+    def get_outputs_names(self):
+        """Retrieves the list of outputs, i.e. the columns of the observations."""
+        return self.output_keys
+
+    def step(self, actions=None):
+        """Advances all environments one timestep.
+
+        Parameters
+        ----------
+        actions : array_like, optional
+            Inputs of shape (num_envs, number of inputs). If None, the
+            actions array is used as it is, which allows writing it in place.
+
+        Returns
+        -------
+        observations : np.ndarray
+            Outputs of shape (num_envs, number of outputs).
+        times : np.ndarray
+            Simulation time of each environment after the step.
+        dones : np.ndarray
+            Flags the environments that reached their stop time. They are
+            reset after returning their last observation.
+
+        The returned arrays are shared buffers overwritten by the next call.
+        """
+        if actions is not None:
+            self.actions[:] = actions
+        self._call_all("step")
+        return self.observations, self.times, self.dones
+
+    def reset(self):
+        """Resets all environments.
+
+        Returns
+        -------
+        np.ndarray
+            Outputs of shape (num_envs, number of outputs) after the reset.
+        """
+        self._call_all("reset")
+        return self.observations
+
+    def get_forecast(self, forecast_length=24, n_members=None):
+        """Gets the weather forecasts of all environments.
+
+        Parameters
+        ----------
+        forecast_length : int, optional
+            Number of timesteps that will be forecasted, by default 24
+        n_members : int, optional
+            Number of members of a forecast ensemble, by default None
+
+        Returns
+        -------
+        list of dict
+            The forecast of each environment.
+        """
+        return self._call_all("get_forecast", forecast_length, n_members)
+
+    def get_kpi(self, start_ind=0, end_ind=-1):
+        """Gets the KPIs of all environments.
+
+        Returns
+        -------
+        list of dict
+            The KPI summary of each environment.
+        """
+        return self._call_all("get_kpi", start_ind, end_ind)
+
+    def close(self):
+        """Closes the environments and stops the workers."""
+        if self.closed:
+            return
+        self.closed = True
+        for pipe in self._pipes:
+            try:
+                pipe.send(("close", ()))
+            except OSError:
+                pass
+        for process in self._processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+        for pipe in self._pipes:
+            pipe.close()
+        self.actions = self.observations = self.times = self.dones = None
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
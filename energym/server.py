@@ -0,0 +1,625 @@
+import os
+import socket
+import struct
+import pickle
+import logging
+import threading
+import traceback
+import socketserver
+import multiprocessing as mp
+
+import numpy as np
+
+from energym.envs.env import Env
+
+logger = logging.getLogger(__name__)
+
+# Frame header: operation code and payload length
+HEADER = struct.Struct("!BI")
+# Requests
+MAKE, STEP, CALL, CLOSE = 1, 2, 3, 4
+# Replies
+OK, RESTARTED, ERROR = 0, 254, 255
+# Methods of the environments that clients can call with CALL
+REMOTE_METHODS = {
+    "reset",
+    "get_output",
+    "get_forecast",
+    "get_kpi",
+    "get_cumulative_kpi",
+    "get_date",
+    "get_history",
+    "sample_random_action",
+}
+
+
+def send_frame(sock, op, payload=b""):
+    """Sends one frame over a stream socket.
+
+    Parameters
+    ----------
+    sock : socket.socket
+        Connected socket.
+    op : int
+        Operation code of the frame.
+    payload : bytes, optional
+        Content of the frame, by default empty
+    """
+    sock.sendall(HEADER.pack(op, len(payload)) + payload)
+
+
+def _recv_exactly(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise EOFError("The connection was closed")
+        received += n
+    return bytes(buffer)
+
+
+def recv_frame(sock):
+    """Receives one frame from a stream socket.
+
+    Parameters
+    ----------
+    sock : socket.socket
+        Connected socket.
+
+    Returns
+    -------
+    op : int
+        Operation code of the frame.
+    payload : bytes
+        Content of the frame.
+
+    Raises
+    ------
+    EOFError
+        If the connection is closed.
+    """
+    op, size = HEADER.unpack(_recv_exactly(sock, HEADER.size))
+    return op, _recv_exactly(sock, size)
+
+
+def encode_step(mask, u):
+    """Encodes the inputs of a step.
+
+    Parameters
+    ----------
+    mask : np.ndarray
+        Whether every input is set, the others take their default value.
+    u : np.ndarray
+        Input values, one per input name.
+
+    Returns
+    -------
+    bytes
+        One byte per input for the mask, followed by the float64 values.
+    """
+    return mask.astype(np.uint8).tobytes() + u.astype("<f8").tobytes()
+
+
+def decode_step(payload):
+    """Decodes the inputs of a step encoded by encode_step().
+
+    Parameters
+    ----------
+    payload : bytes
+        Encoded inputs.
+
+    Returns
+    -------
+    mask : np.ndarray
+        Whether every input is set.
+    u : np.ndarray
+        Input values, one per input name.
+
+    Raises
+    ------
+    ValueError
+        If the payload is malformed or a set value is NaN.
+    """
+    n_inputs, remainder = divmod(len(payload), 9)
+    if remainder:
+        raise ValueError("Malformed step of {} bytes".format(len(payload)))
+    mask = np.frombuffer(payload[:n_inputs], dtype=np.uint8).astype(bool)
+    u = np.frombuffer(payload[n_inputs:], dtype="<f8")
+    if np.isnan(u[mask]).any():
+        raise ValueError("Input values must not be NaN")
+    return mask, u
+
+
+def _simulator(pipe):
+    """Hosts environments in a worker process of a SimulationServer."""
+    from energym.factory import make
+
+    envs = {}
+    try:
+        while True:
+            try:
+                command, env_id, args = pipe.recv()
+            except EOFError:
+                break
+            if command == "stop":
+                break
+            try:
+                if command == "make":
+                    key, kwargs = args
+                    env = make(key, **kwargs)
+                    if env is None:
+                        raise Exception("Unable to build environment {}".format(key))
+                    envs[env_id] = env
+                    result = (
+                        env.get_inputs_names(),
+                        env.get_outputs_names(),
+                        env.time,
+                        env.start_time,
+                        env.stop_time,
+                        env.step_size,
+                    )
+                elif command == "step":
+                    env = envs[env_id]
+                    # the inputs that are not set take their default value
+                    mask, values = args
+                    u = np.where(mask, values, env._input_defaults)
+                    outputs = env.step_array(u)
+                    result = np.concatenate([[env.time], outputs])
+                elif command == "call":
+                    name, call_args, call_kwargs = args
+                    env = envs[env_id]
+                    result = (getattr(env, name)(*call_args, **call_kwargs), env.time)
+                elif command == "close":
+                    env = envs.pop(env_id, None)
+                    if env is not None:
+                        env.close()
+                    result = None
+                else:
+                    raise Exception("Unknown command {}".format(command))
+                pipe.send(("ok", result))
+            except Exception:
+                pipe.send(("error", traceback.format_exc()))
+    finally:
+        for env in envs.values():
+            try:
+                env.close()
+            except BaseException as e:
+                logger.error(f"Environment could not be closed. {e}")
+        pipe.close()
+
+
+class _WorkerCrashed(Exception):
+    """Raised for the requests of an environment rebuilt after a crash."""
+
+
+class _Simulator(object):
+    """Worker process of a SimulationServer and the environments it hosts."""
+
+    def __init__(self, ctx):
+        self.ctx = ctx
+        self.lock = threading.Lock()
+        # make() arguments of the hosted environments, to rebuild them
+        self.envs = {}
+        # Environments rebuilt after a crash whose client was not told yet
+        self.restarted = set()
+        self._start()
+
+    def _start(self):
+        self.pipe, child_pipe = self.ctx.Pipe()
+        self.process = self.ctx.Process(
+            target=_simulator, args=(child_pipe,), daemon=True
+        )
+        self.process.start()
+        child_pipe.close()
+
+    def _restart(self):
+        logger.warning(
+            "Simulation worker {} crashed, restarting it".format(self.process.pid)
+        )
+        self.pipe.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+        self._start()
+        self.restarted.update(self.envs)
+        for env_id, args in self.envs.items():
+            self.pipe.send(("make", env_id, args))
+            status, result = self.pipe.recv()
+            if status != "ok":
+                logger.error(
+                    "Environment {} could not be rebuilt.\n{}".format(env_id, result)
+                )
+
+    def call(self, command, env_id, args):
+        """Runs a command in the worker process.
+
+        Raises
+        ------
+        _WorkerCrashed
+            If the worker crashed. A crashed worker is restarted with its
+            environments at their start time, and the next command of each
+            of the other environments raises as well.
+        Exception
+            If the command failed.
+        """
+        message = "The simulation worker crashed, the environment was restarted"
+        with self.lock:
+            if env_id in self.restarted and command != "close":
+                self.restarted.discard(env_id)
+                raise _WorkerCrashed(message)
+            try:
+                self.pipe.send((command, env_id, args))
+                status, result = self.pipe.recv()
+            except (EOFError, OSError):
+                self._restart()
+                self.restarted.discard(env_id)
+                raise _WorkerCrashed(message)
+            if status != "ok":
+                raise Exception(result)
+            if command == "make":
+                self.envs[env_id] = args
+            elif command == "close":
+                self.envs.pop(env_id, None)
+                self.restarted.discard(env_id)
+            return result
+
+    def stop(self):
+        with self.lock:
+            try:
+                self.pipe.send(("stop", None, None))
+            except OSError:
+                pass
+            self.pipe.close()
+        self.process.join(timeout=30)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class _ConnectionHandler(socketserver.BaseRequestHandler):
+    """Serves the requests of one RemoteEnv."""
+
+    def handle(self):
+        server = self.server.simulation_server
+        sock = self.request
+        simulator = None
+        env_id = None
+        try:
+            while True:
+                try:
+                    op, payload = recv_frame(sock)
+                except EOFError:
+                    break
+                try:
+                    if op == MAKE:
+                        if env_id is not None:
+                            raise Exception("The connection has an environment")
+                        simulator, env_id = server._assign()
+                        result = simulator.call("make", env_id, pickle.loads(payload))
+                        send_frame(sock, OK, pickle.dumps(result))
+                    elif op == STEP:
+                        result = simulator.call("step", env_id, decode_step(payload))
+                        send_frame(sock, OK, result.astype("<f8").tobytes())
+                    elif op == CALL:
+                        name, args, kwargs = pickle.loads(payload)
+                        if name not in REMOTE_METHODS:
+                            raise Exception("Method {} cannot be called".format(name))
+                        result = simulator.call("call", env_id, (name, args, kwargs))
+                        send_frame(sock, OK, pickle.dumps(result))
+                    elif op == CLOSE:
+                        break
+                    else:
+                        raise Exception("Unknown operation {}".format(op))
+                except _WorkerCrashed as e:
+                    send_frame(sock, RESTARTED, str(e).encode())
+                except Exception as e:
+                    send_frame(sock, ERROR, str(e).encode())
+        finally:
+            if env_id is not None:
+                try:
+                    simulator.call("close", env_id, None)
+                except Exception as e:
+                    logger.error(f"Environment {env_id} could not be closed. {e}")
+                server._release(simulator)
+
+
+class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class SimulationServer(object):
+    """Hosts environments in a fixed pool of worker processes.
+
+    Clients connect with RemoteEnv over a Unix domain socket, one
+    connection per environment. Every new environment is created in the
+    least loaded worker process, so that many clients share the workers.
+    A worker that crashes is restarted and its environments are rebuilt at
+    their start time. The request that was running fails, and so does the
+    next request of every other environment of the worker.
+
+    A rebuilt environment is made again by energym.make(), which draws new
+    random schedules, e.g. of the electric vehicles, unless eval_mode is
+    set.
+
+    Steps are exchanged as raw vectors, the inputs with a mask of the ones
+    that are set, the other requests and replies are pickled.
+
+    Attributes
+    ----------
+    address : str
+        Path of the Unix domain socket.
+    n_workers : int
+        Number of worker processes.
+
+    Methods
+    -------
+    serve_forever()
+        Serves the clients until shutdown() is called.
+    start()
+        Serves the clients from a background thread.
+    shutdown()
+        Stops serving and stops the worker processes.
+    """
+
+    def __init__(self, address, n_workers=None, start_method=None):
+        """
+        Parameters
+        ----------
+        address : str
+            Path of the Unix domain socket, replaced if it exists.
+        n_workers : int, optional
+            Number of worker processes, by default the number of CPUs
+        start_method : str, optional
+            Start method of the worker processes ('fork', 'spawn' or
+            'forkserver'), by default the platform default
+        """
+        self.address = address
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count() or 1
+        ctx = mp.get_context(start_method)
+        self._simulators = [_Simulator(ctx) for _ in range(self.n_workers)]
+        self._loads = [0] * self.n_workers
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        if os.path.exists(address):
+            os.remove(address)
+        self._server = _UnixServer(address, _ConnectionHandler)
+        self._server.simulation_server = self
+
+    def _assign(self):
+        with self._lock:
+            index = self._loads.index(min(self._loads))
+            self._loads[index] += 1
+            self._next_id += 1
+            return self._simulators[index], self._next_id
+
+    def _release(self, simulator):
+        with self._lock:
+            self._loads[self._simulators.index(simulator)] -= 1
+
+    def serve_forever(self):
+        """Serves the clients until shutdown() is called."""
+        self._server.serve_forever()
+
+    def start(self):
+        """Serves the clients from a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+
+    def shutdown(self):
+        """Stops serving and stops the worker processes."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        for simulator in self._simulators:
+            simulator.stop()
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+
+class RemoteEnv(Env):
+    """Environment hosted by a SimulationServer.
+
+    Implements the Env interface by forwarding the calls to the server.
+    A crash of the simulation raises an exception in the clients of the
+    crashed worker only, the environment is then back at its start time.
+
+    Attributes
+    ----------
+    input_keys : list of str
+        Names of the inputs.
+    output_keys : list of str
+        Names of the outputs.
+    time : float
+        Current simulation time.
+    start_time : float
+        Start of the simulation time in seconds.
+    stop_time : float
+        End of the simulation time in seconds.
+    step_size : float
+        Simulation stepsize in seconds.
+
+    Methods
+    -------
+    step(inputs=None)
+        Advances the simulation one timestep.
+    step_array(u)
+        Advances the simulation one timestep with an input vector.
+    reset()
+        Resets the simulation.
+    get_output()
+        Gets the outputs of the last simulation step.
+    get_forecast(forecast_length=24, n_members=None)
+        Generates a weather forecast of a given length.
+    get_kpi(start_ind=0, end_ind=-1)
+        Retrieves the KPIs.
+    get_date()
+        Gets the current simulation time.
+    get_history(keys=None, last_n=None)
+        Gets the outputs of the last steps, as a copy.
+    close()
+        Closes the environment on the server.
+    """
+
+    def __init__(self, address, key, **kwargs):
+        """
+        Parameters
+        ----------
+        address : str
+            Path of the Unix domain socket of the server.
+        key : str
+            Name of the simulation model, as for energym.make().
+        **kwargs
+            Arguments passed to energym.make().
+
+        Raises
+        ------
+        Exception
+            If the environment cannot be created.
+        """
+        super().__init__()
+        self.closed = True
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._sock.connect(address)
+        self.closed = False
+        (
+            self.input_keys,
+            self.output_keys,
+            self.time,
+            self.start_time,
+            self.stop_time,
+            self.step_size,
+        ) = pickle.loads(self._request(MAKE, pickle.dumps((key, kwargs))))
+        self._input_index = {key: i for i, key in enumerate(self.input_keys)}
+
+    def _request(self, op, payload=b""):
+        send_frame(self._sock, op, payload)
+        status, reply = recv_frame(self._sock)
+        if status == RESTARTED:
+            self.time = self.start_time
+            raise Exception(reply.decode())
+        if status == ERROR:
+            raise Exception(reply.decode())
+        return reply
+
+    def _call(self, name, *args, **kwargs):
+        result, self.time = pickle.loads(
+            self._request(CALL, pickle.dumps((name, args, kwargs)))
+        )
+        return result
+
+    def get_inputs_names(self):
+        """Retrieves the list of inputs."""
+        return self.input_keys
+
+    def get_outputs_names(self):
+        """Retrieves the list of outputs."""
+        return self.output_keys
+
+    def step_array(self, u):
+        """Advances the simulation one timestep with an input vector.
+
+        Parameters
+        ----------
+        u : array_like
+            Input values, one per input name.
+
+        Returns
+        -------
+        np.ndarray
+            Output values, one per output name.
+
+        Raises
+        ------
+        ValueError
+            If u has not one value per input or holds NaN values.
+        """
+        u = np.asarray(u, dtype="<f8")
+        if u.shape != (len(self.input_keys),):
+            raise ValueError(
+                "u must be of shape ({},), got {}".format(len(self.input_keys), u.shape)
+            )
+        return self._step(np.ones(len(u), dtype=bool), u)
+
+    def _step(self, mask, u):
+        if np.isnan(u[mask]).any():
+            raise ValueError("Input values must not be NaN")
+        reply = np.frombuffer(self._request(STEP, encode_step(mask, u)), dtype="<f8")
+        self.time = float(reply[0])
+        return reply[1:]
+
+    def step(self, inputs=None):
+        """Advances the simulation one timestep.
+
+        Parameters
+        ----------
+        inputs : dict, optional
+            Inputs for the system. Keys are input names, values are
+            iterables with one input value. Missing inputs take their
+            default value.
+
+        Returns
+        -------
+        dict
+            Outputs for the system, and the simulation time.
+
+        Raises
+        ------
+        ValueError
+            If an input is unknown, has more than one value or is NaN.
+        """
+        mask = np.zeros(len(self.input_keys), dtype=bool)
+        u = np.zeros(len(self.input_keys))
+        for key, value in (inputs or {}).items():
+            if key not in self._input_index:
+                raise ValueError("Undefined Input {}".format(key))
+            if len(value) != 1:
+                raise ValueError(
+                    "Input {} must have one value, got {}".format(key, len(value))
+                )
+            mask[self._input_index[key]] = True
+            u[self._input_index[key]] = value[0]
+        outputs = dict(zip(self.output_keys, self._step(mask, u).tolist()))
+        outputs["time"] = self.time
+        return outputs
+
+    def reset(self):
+        """Resets the simulation."""
+        return self._call("reset")
+
+    def get_output(self):
+        """Gets the outputs of the last simulation step."""
+        return self._call("get_output")
+
+    def get_forecast(self, forecast_length=24, n_members=None):
+        """Generates a weather forecast of a given length."""
+        return self._call("get_forecast", forecast_length, n_members=n_members)
+
+    def get_kpi(self, start_ind=0, end_ind=-1):
+        """Retrieves the KPIs."""
+        return self._call("get_kpi", start_ind, end_ind)
+
+    def get_date(self):
+        """Gets the current simulation time."""
+        return self._call("get_date")
+
+    def get_history(self, keys=None, last_n=None):
+        """Gets the outputs of the last steps, as a copy."""
+        return self._call("get_history", keys, last_n)
+
+    def close(self):
+        """Closes the environment on the server."""
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            send_frame(self._sock, CLOSE)
+        except OSError:
+            pass
+        self._sock.close()
+
+    def __del__(self):
+        if not getattr(self, "closed", True):
+            self.close()
@@ -3,6 +3,7 @@ from collections import OrderedDict
 import numpy as np
 
 from .space import Space
+from .utils import split_seed
 
 
 class Dict(Space):
@@ -65,7 +66,10 @@ class Dict(Space):
         super(Dict, self).__init__(None, None)
 
     def seed(self, seed=None):
-        [space.seed(seed) for space in self.spaces.values()]
+        seeds = split_seed(seed, len(self.spaces))
+        return [
+            s for space, sub in zip(self.spaces.values(), seeds) for s in space.seed(sub)
+        ]
 
     def sample(self):
         return OrderedDict([(k, space.sample()) for k, space in self.spaces.items()])
@@ -1,5 +1,6 @@
 import numpy as np
 from .space import Space
+from .utils import split_seed
 
 
 class Tuple(Space):
@@ -18,7 +19,8 @@ class Tuple(Space):
         super(Tuple, self).__init__(None, None)
 
     def seed(self, seed=None):
-        [space.seed(seed) for space in self.spaces]
+        seeds = split_seed(seed, len(self.spaces))
+        return [s for space, sub in zip(self.spaces, seeds) for s in space.seed(sub)]
 
     def sample(self):
         return tuple([space.sample() for space in self.spaces])
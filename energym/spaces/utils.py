@@ -40,6 +40,15 @@ def hash_seed(seed=None, max_bytes=8):
     return _bigint_from_bytes(hash[:max_bytes])
 
 
+def split_seed(seed, n):
+    """Derives n independent seeds from one seed, e.g. for the subspaces
+    of a composite space. Returns n times None if seed is None.
+    """
+    if seed is None:
+        return [None] * n
+    return [int(s) for s in np.random.SeedSequence(seed).generate_state(n)]
+
+
 def create_seed(a=None, max_bytes=8):
     """Create a strong random seed. Otherwise, Python 2 would seed using
     the system time, which might be non-robust especially in the
@@ -0,0 +1,445 @@
+import os
+import time
+import shutil
+import logging
+import itertools
+import traceback
+import multiprocessing as mp
+from multiprocessing.connection import wait
+
+import pandas as pd
+
+from energym.envs.env_fmu import CALENDAR_YEAR
+
+logger = logging.getLogger(__name__)
+
+
+class ControllerSpec(object):
+    """Picklable description of a rule-based controller.
+
+    Builds one of the controllers of energym.examples.Controller (or any
+    class with the same interface) for an environment and turns it into a
+    policy for run_scenario().
+
+    Attributes
+    ----------
+    controller_class : type
+        Class of the controller, e.g. SimpleController.
+    temp_sp : float
+        Goal temperature passed to get_control().
+    fixed_inputs : dict
+        Inputs set to a constant value at every step, on top of the
+        controls of the controller.
+    kwargs : dict
+        Arguments of the controller besides control_list.
+    """
+
+    def __init__(self, controller_class, temp_sp=21.0, fixed_inputs=None, **kwargs):
+        """
+        Parameters
+        ----------
+        controller_class : type
+            Class of the controller, e.g. SimpleController.
+        temp_sp : float, optional
+            Goal temperature passed to get_control(), by default 21.0
+        fixed_inputs : dict, optional
+            Inputs set to a constant value at every step, by default None
+        **kwargs
+            Arguments of the controller. If control_list is not given, the
+            inputs of the environment that are not fixed are used.
+        """
+        self.controller_class = controller_class
+        self.temp_sp = temp_sp
+        self.fixed_inputs = fixed_inputs if fixed_inputs is not None else {}
+        self.kwargs = kwargs
+
+    def __call__(self, env):
+        """Builds the policy of the controller for an environment.
+
+        Parameters
+        ----------
+        env : Env
+            The controlled environment.
+
+        Returns
+        -------
+        callable
+            Policy mapping the outputs and the environment to the inputs.
+        """
+        kwargs = dict(self.kwargs)
+        if "control_list" not in kwargs:
+            kwargs["control_list"] = [
+                key for key in env.get_inputs_names() if key not in self.fixed_inputs
+            ]
+        controller = self.controller_class(**kwargs)
+        fixed_inputs = {key: [value] for key, value in self.fixed_inputs.items()}
+
+        def policy(outputs, env):
+            _, hour, _, _ = env.get_date()
+            controls = controller.get_control(outputs, self.temp_sp, hour)
+            controls.update(fixed_inputs)
+            return controls
+
+        return policy
+
+
+def _check_start_date(start_date):
+    """Raises a ValueError if a start date is not in the calendar year.
+
+    The simulations count their time from the first of January of
+    CALENDAR_YEAR, whose weekdays the calendar and the schedules use, so a
+    date of another year cannot be simulated as such.
+    """
+    if start_date is not None and start_date.year != CALENDAR_YEAR:
+        raise ValueError(
+            "Start date {} is not in {}, the year of the simulation "
+            "calendar".format(start_date, CALENDAR_YEAR)
+        )
+
+
+def make_grid(keys, weathers=None, start_dates=None, controllers=None):
+    """Builds the scenarios of a sweep.
+
+    Parameters
+    ----------
+    keys : list of str
+        Names of the simulation models, see EnvNames.
+    weathers : list of str, optional
+        Weather keys, see WEATHERNAMES, by default None, i.e. the default
+        weather of every model
+    start_dates : list of datetime.date, optional
+        Start dates of the simulations, in CALENDAR_YEAR, by default None,
+        i.e. the default start date of every model
+    controllers : dict, optional
+        Policy factories keyed by name. A factory takes the environment and
+        returns a function computing the inputs from the outputs and the
+        environment, see ControllerSpec. None stands for the default inputs.
+        By default {"default": None}
+
+    Returns
+    -------
+    list of dict
+        One scenario per combination, with the keys 'run_id', 'key',
+        'weather', 'start_date', 'controller' and 'controller_factory'.
+
+    Raises
+    ------
+    ValueError
+        If a start date is not in CALENDAR_YEAR.
+    """
+    if weathers is None:
+        weathers = [None]
+    if start_dates is None:
+        start_dates = [None]
+    for start_date in start_dates:
+        _check_start_date(start_date)
+    if controllers is None:
+        controllers = {"default": None}
+    scenarios = []
+    for key, weather, start_date, name in itertools.product(
+        keys, weathers, start_dates, controllers
+    ):
+        scenarios.append(
+            {
+                "run_id": len(scenarios),
+                "key": key,
+                "weather": weather,
+                "start_date": start_date,
+                "controller": name,
+                "controller_factory": controllers[name],
+            }
+        )
+    return scenarios
+
+
+def run_scenario(scenario, simulation_days=1, make_kwargs=None):
+    """Simulates one scenario until the stop time of its environment.
+
+    Parameters
+    ----------
+    scenario : dict
+        Scenario built by make_grid().
+    simulation_days : int, optional
+        Number of simulated days, by default 1
+    make_kwargs : dict, optional
+        Further arguments passed to energym.make(), by default None
+
+    Returns
+    -------
+    dict
+        The KPI values keyed by "<variable name>:<KPI type>".
+
+    Raises
+    ------
+    ValueError
+        If the start date is not in CALENDAR_YEAR.
+    Exception
+        If the environment cannot be built.
+    """
+    from energym.factory import make
+
+    kwargs = dict(make_kwargs) if make_kwargs is not None else {}
+    kwargs["simulation_days"] = simulation_days
+    if scenario["weather"] is not None:
+        kwargs["weather"] = scenario["weather"]
+    start_date = scenario["start_date"]
+    _check_start_date(start_date)
+    if start_date is not None:
+        kwargs["start_day"] = start_date.day
+        kwargs["start_month"] = start_date.month
+    env = make(scenario["key"], **kwargs)
+    if env is None:
+        raise Exception("Unable to build environment {}".format(scenario["key"]))
+    try:
+        factory = scenario["controller_factory"]
+        policy = factory(env) if factory is not None else None
+        outputs = env.get_output()
+        while env.time < env.stop_time:
+            inputs = policy(outputs, env) if policy is not None else {}
+            outputs = env.step(inputs)
+        kpis = env.get_kpi()
+    finally:
+        env.close()
+    return {
+        "{}:{}".format(kpi["name"], kpi["type"]): kpi["kpi"] for kpi in kpis.values()
+    }
+
+
+def _worker(pipe, simulation_days, make_kwargs):
+    """Runs the scenarios sent by sweep() one after the other."""
+    while True:
+        try:
+            scenario = pipe.recv()
+        except EOFError:
+            break
+        if scenario is None:
+            break
+        try:
+            result = run_scenario(scenario, simulation_days, make_kwargs)
+            pipe.send(("ok", result))
+        except BaseException:
+            pipe.send(("error", traceback.format_exc()))
+    pipe.close()
+
+
+class _Worker(object):
+    """Worker process of a sweep with the scenario it is running."""
+
+    def __init__(self, ctx, simulation_days, make_kwargs):
+        self.pipe, child_pipe = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker, args=(child_pipe, simulation_days, make_kwargs), daemon=True
+        )
+        self.process.start()
+        child_pipe.close()
+        self.scenario = None
+        self.started = None
+
+    def submit(self, scenario):
+        self.scenario = scenario
+        self.started = time.time()
+        self.pipe.send(scenario)
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.terminate()
+        else:
+            try:
+                self.pipe.send(None)
+            except OSError:
+                pass
+        self.process.join(timeout=30)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.pipe.close()
+
+
+def _parts_dir(path):
+    """Folder of the results of the single runs of a sweep saved to path."""
+    return path + ".parts"
+
+
+def _save_part(row, path):
+    """Saves the result of one run next to path, in the format of path."""
+    parts_dir = _parts_dir(path)
+    os.makedirs(parts_dir, exist_ok=True)
+    frame = pd.DataFrame([row])
+    part = os.path.join(parts_dir, "{:06d}".format(row["run_id"]))
+    if path.endswith(".csv"):
+        frame.to_csv(part + ".tmp", index=False)
+        os.replace(part + ".tmp", part + ".csv")
+    else:
+        frame.to_parquet(part + ".tmp")
+        os.replace(part + ".tmp", part + ".parquet")
+
+
+def _merge_parts(path):
+    """Merges the results saved by _save_part() into path."""
+    parts_dir = _parts_dir(path)
+    if not os.path.isdir(parts_dir):
+        return
+    names = sorted(name for name in os.listdir(parts_dir) if not name.endswith(".tmp"))
+    parts = [os.path.join(parts_dir, name) for name in names]
+    if path.endswith(".csv"):
+        frames = [pd.read_csv(part) for part in parts]
+    else:
+        frames = [pd.read_parquet(part) for part in parts]
+    frame = pd.concat(frames, ignore_index=True, sort=False)
+    tmp_path = path + ".tmp"
+    if path.endswith(".csv"):
+        frame.to_csv(tmp_path, index=False)
+    else:
+        frame.to_parquet(tmp_path)
+    os.replace(tmp_path, path)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+
+
+def sweep(
+    keys,
+    weathers=None,
+    start_dates=None,
+    controllers=None,
+    simulation_days=1,
+    n_workers=None,
+    retries=1,
+    timeout=None,
+    path=None,
+    start_method=None,
+    make_kwargs=None,
+):
+    """Runs a grid of scenarios in a pool of worker processes.
+
+    Every combination of model, weather, start date and controller is
+    simulated until the stop time of its environment. Idle workers take
+    the next pending scenario, so that long and short runs balance across
+    the pool. A run that fails is retried, and a run that exceeds the
+    timeout is killed with its worker, which is replaced.
+
+    Parameters
+    ----------
+    keys : list of str
+        Names of the simulation models, see EnvNames.
+    weathers : list of str, optional
+        Weather keys, see WEATHERNAMES, by default the default weather of
+        every model
+    start_dates : list of datetime.date, optional
+        Start dates in CALENDAR_YEAR, by default the default start date of
+        every model
+    controllers : dict, optional
+        Policy factories keyed by name, see make_grid(), by default the
+        default inputs
+    simulation_days : int, optional
+        Number of simulated days per run, by default 1
+    n_workers : int, optional
+        Number of worker processes, by default the number of CPUs
+    retries : int, optional
+        Number of times a failed run is retried, by default 1
+    timeout : float, optional
+        Largest duration of a run in seconds, by default None (no limit)
+    path : str, optional
+        Parquet file where the results are saved, or CSV file if the name
+        ends with .csv, by default None. The result of every finished run
+        is written to its own file in the folder path + ".parts", which is
+        merged into path once the sweep ends.
+    start_method : str, optional
+        Start method of the worker processes ('fork', 'spawn' or
+        'forkserver'), by default the platform default
+    make_kwargs : dict, optional
+        Further arguments passed to energym.make(), by default None
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per scenario with the columns 'run_id', 'key', 'weather',
+        'start_date', 'controller', 'status' ('ok', 'error' or 'timeout'),
+        'attempts', 'duration' and 'error', followed by one column per KPI.
+
+    Raises
+    ------
+    ValueError
+        If a start date is not in CALENDAR_YEAR.
+    """
+    scenarios = make_grid(keys, weathers, start_dates, controllers)
+    if n_workers is None:
+        n_workers = os.cpu_count() or 1
+    n_workers = max(1, min(n_workers, len(scenarios)))
+    ctx = mp.get_context(start_method)
+    pending = list(reversed(scenarios))
+    attempts = {scenario["run_id"]: 0 for scenario in scenarios}
+    rows = {}
+    if path is not None:
+        shutil.rmtree(_parts_dir(path), ignore_errors=True)
+    workers = [_Worker(ctx, simulation_days, make_kwargs) for _ in range(n_workers)]
+
+    def finish(scenario, status, duration, result=None, error=None):
+        run_id = scenario["run_id"]
+        if status != "ok" and attempts[run_id] <= retries:
+            logger.warning("Run {} failed ({}), retrying".format(run_id, status))
+            pending.append(scenario)
+            return
+        row = {
+            "run_id": run_id,
+            "key": scenario["key"],
+            "weather": scenario["weather"],
+            "start_date": scenario["start_date"],
+            "controller": scenario["controller"],
+            "status": status,
+            "attempts": attempts[run_id],
+            "duration": duration,
+            "error": error,
+        }
+        if result is not None:
+            row.update(result)
+        rows[run_id] = row
+        if path is not None:
+            _save_part(row, path)
+
+    try:
+        while len(rows) < len(scenarios):
+            for worker in workers:
+                if worker.scenario is None and pending:
+                    scenario = pending.pop()
+                    attempts[scenario["run_id"]] += 1
+                    worker.submit(scenario)
+            busy = [worker for worker in workers if worker.scenario is not None]
+            wait_time = None
+            if timeout is not None and busy:
+                now = time.time()
+                wait_time = max(0.0, min(w.started + timeout - now for w in busy))
+            ready = wait([worker.pipe for worker in busy], timeout=wait_time)
+            now = time.time()
+            for index, worker in enumerate(workers):
+                if worker.scenario is None:
+                    continue
+                scenario, duration = worker.scenario, now - worker.started
+                if worker.pipe in ready:
+                    try:
+                        status, result = worker.pipe.recv()
+                    except EOFError:
+                        status, result = "error", "The worker process died"
+                        worker.stop(kill=True)
+                        workers[index] = _Worker(ctx, simulation_days, make_kwargs)
+                    worker.scenario = None
+                    if status == "ok":
+                        finish(scenario, "ok", duration, result=result)
+                    else:
+                        finish(scenario, "error", duration, error=result)
+                elif timeout is not None and duration >= timeout:
+                    worker.stop(kill=True)
+                    workers[index] = _Worker(ctx, simulation_days, make_kwargs)
+                    finish(
+                        scenario,
+                        "timeout",
+                        duration,
+                        error="Timeout after {:.0f} s".format(duration),
+                    )
+    finally:
+        for worker in workers:
+            worker.stop(kill=worker.scenario is not None)
+        if path is not None:
+            _merge_parts(path)
+    return _to_frame(rows)
+
+
+def _to_frame(rows):
+    return pd.DataFrame([rows[run_id] for run_id in sorted(rows)])
@@ -1,12 +1,16 @@
 import copy
 
-from energym import spaces
+from energym.spaces.dict import Dict
 from energym.envs.env import OutputsWrapper
 
 
 class FilterOutputs(OutputsWrapper):
     """Filter dictionary observations by their keys.
 
+    When it wraps the simulation environment directly, only the kept
+    outputs and the ones needed by the KPIs are read from the simulation,
+    see select_outputs().
+
     Args:
         env: The environment to wrap.
         filter_keys: List of keys to be included in the observations.
@@ -24,7 +28,7 @@ class FilterOutputs(OutputsWrapper):
 
         wrapped_output_space = env.output_space
         assert isinstance(
-            wrapped_output_space, spaces.Dict
+            wrapped_output_space, Dict
         ), "FilterObservationWrapper is only usable with dict observations."
 
         output_keys = wrapped_output_space.spaces.keys()
@@ -57,6 +61,8 @@ class FilterOutputs(OutputsWrapper):
 
         self._env = env
         self._filter_keys = tuple(filter_keys)
+        if env is env.unwrapped and hasattr(env, "select_outputs"):
+            env.select_outputs(self._filter_keys)
 
     def outputs(self, outputs):
         filter_outputs = self._filter_outputs(outputs)
@@ -0,0 +1,74 @@
+import argparse
+import time
+import statistics
+
+import energym
+from energym.envs.env_names import EnvNames
+from energym.envs.utils.fmu_cache import load_model_info
+from fmpy import read_model_description
+
+###############################################################################################
+# Script to measure the latency of energym.make() and of the model description loading
+###############################################################################################
+
+
+def time_calls(fun, repeat):
+    timings = []
+    for _ in range(repeat):
+        tic = time.perf_counter()
+        fun()
+        timings.append(time.perf_counter() - tic)
+    return timings
+
+
+def report(label, timings):
+    print(
+        "{:<45} mean {:8.2f} ms   min {:8.2f} ms".format(
+            label, 1e3 * statistics.mean(timings), 1e3 * min(timings)
+        )
+    )
+
+
+def benchmark(key, repeat, simulation_days):
+    envs = []
+
+    def make():
+        env = energym.make(key, simulation_days=simulation_days)
+        envs.append(env)
+
+    # the first call fills the caches
+    report(key + " make (first)", time_calls(make, 1))
+    report(key + " make", time_calls(make, repeat))
+    env = envs[0]
+    report(
+        "  read_model_description",
+        time_calls(lambda: read_model_description(env.fmu_file), repeat),
+    )
+    report(
+        "  load_model_info (cached)",
+        time_calls(lambda: load_model_info(env.fmu_file, env.model_cache_path), repeat),
+    )
+    for env in envs:
+        env.close()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(description="Benchmark of energym.make()")
+
+    parser.add_argument(
+        "-keys",
+        nargs="+",
+        default=[EnvNames.SIMPLE_HOUSE_RAD_V0.value],
+        help="Environment names to benchmark, e.g. SeminarcenterThermostat-v0",
+    )
+    parser.add_argument(
+        "-repeat", type=int, default=10, help="Number of timed calls per key"
+    )
+    parser.add_argument(
+        "-days", type=int, default=1, help="Number of simulation days of the envs"
+    )
+    args = parser.parse_args()
+
+    for key in args.keys:
+        benchmark(key, args.repeat, args.days)
@@ -0,0 +1,54 @@
+import argparse
+import time
+
+import energym
+from energym.envs.env_names import EnvNames
+
+###############################################################################################
+# Script to write the start-of-day snapshots used by the EnergyPlus environments
+###############################################################################################
+
+
+def build(key, weather, days):
+    kwargs = dict(start_day=1, start_month=1, simulation_days=days)
+    if weather is not None:
+        kwargs["weather"] = weather
+    env = energym.make(key, **kwargs)
+    try:
+        if not env.supports_fmu_serialization():
+            print("{}: the FMU cannot serialize its state, skipped".format(key))
+            return
+        tic = time.perf_counter()
+        paths = env.write_state_library()
+        print(
+            "{}: {} snapshots written to {} in {:.1f} s".format(
+                key, len(paths), env.state_library_dir, time.perf_counter() - tic
+            )
+        )
+    finally:
+        env.close()
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser(
+        description="Simulates EnergyPlus models over the year with default inputs "
+        "and stores their state at every day boundary"
+    )
+
+    parser.add_argument(
+        "-keys",
+        nargs="+",
+        default=[EnvNames.APARTMENTS_THERMAL_V0.value],
+        help="Environment names, e.g. SeminarcenterThermostat-v0",
+    )
+    parser.add_argument(
+        "-weather", default=None, help="Weather file, by default the one of the env"
+    )
+    parser.add_argument(
+        "-days", type=int, default=365, help="Number of simulated days"
+    )
+    args = parser.parse_args()
+
+    for key in args.keys:
+        build(key, args.weather, args.days)
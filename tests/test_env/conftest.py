@@ -0,0 +1,124 @@
+import shutil
+import zipfile
+import subprocess
+from pathlib import Path
+
+import fmpy
+import pytest
+
+import energym
+from energym.envs.env_fmu import EnvFMU
+from energym.envs.env_fmu_eplus import EnvEPlusFMU
+from energym.envs.utils.weather import MOS
+
+fmus_path = Path(__file__).resolve().parent / "fmus"
+simulation_path = Path(energym.__file__).resolve().parent.parent / "simulation"
+mos_file = simulation_path / "modelica/simple_house/wf/Basel_Fixed.mos"
+epw_file = simulation_path / "energyplus/offices/wf/GRC_Athens.167160_IWEC.epw"
+
+ROOM_INPUTS = {
+    "u": {
+        "type": "scalar",
+        "lower_bound": 0,
+        "upper_bound": 1,
+        "default": 0,
+        "description": "Heating power",
+    }
+}
+ROOM_OUTPUTS = {
+    "T": {
+        "type": "scalar",
+        "lower_bound": 200,
+        "upper_bound": 400,
+        "description": "Room temperature",
+    },
+    "P": {
+        "type": "scalar",
+        "lower_bound": 0,
+        "upper_bound": 1000,
+        "description": "Heating power",
+    },
+}
+ROOM_KPIS = {
+    "kpi1": {"name": "P", "type": "sum"},
+    "kpi2": {"name": "T", "type": "avg"},
+}
+
+
+@pytest.fixture(scope="session")
+def room_fmu(tmp_path_factory):
+    """Builds the room FMU of fmus/, which can serialize its state.
+
+    None of the shipped FMUs can get and set their state, this one drives
+    the code paths that need it.
+    """
+    compiler = shutil.which("cc") or shutil.which("gcc")
+    if compiler is None or not fmpy.platform.startswith("linux"):
+        pytest.skip("the room FMU is only built on Linux with a C compiler")
+    build = tmp_path_factory.mktemp("room")
+    library = build / "room{}".format(fmpy.sharedLibraryExtension)
+    subprocess.run(
+        [
+            compiler,
+            "-shared",
+            "-fPIC",
+            "-O2",
+            "-I",
+            str(Path(fmpy.__file__).parent / "c-code"),
+            "-o",
+            str(library),
+            str(fmus_path / "room.c"),
+        ],
+        check=True,
+    )
+    fmu_file = build / "room.fmu"
+    with zipfile.ZipFile(fmu_file, "w") as fmu:
+        fmu.write(fmus_path / "modelDescription.xml", "modelDescription.xml")
+        fmu.write(library, "binaries/{}/{}".format(fmpy.platform, library.name))
+        fmu.write(mos_file, "resources/weather.mos")
+    return str(fmu_file)
+
+
+@pytest.fixture
+def make_room(room_fmu):
+    """Returns a function creating Modelica-like environments of the room."""
+
+    def make(stop_time=86400, **kwargs):
+        weather = MOS(cache_dir=None)
+        weather.read(mos_file)
+        return EnvFMU(
+            room_fmu,
+            0,
+            stop_time,
+            300,
+            weather,
+            ROOM_INPUTS,
+            ROOM_OUTPUTS,
+            ROOM_KPIS,
+            default_path=False,
+            weather_file_path=str(mos_file),
+            **kwargs
+        )
+
+    return make
+
+
+@pytest.fixture
+def make_room_eplus(room_fmu):
+    """Returns a function creating EnergyPlus-like environments of the room."""
+
+    def make(start_time=0, stop_time=86400, **kwargs):
+        return EnvEPlusFMU(
+            room_fmu,
+            start_time,
+            stop_time,
+            300,
+            str(epw_file),
+            ROOM_INPUTS,
+            ROOM_OUTPUTS,
+            ROOM_KPIS,
+            False,
+            **kwargs
+        )
+
+    return make
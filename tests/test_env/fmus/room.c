@@ -0,0 +1,238 @@
+/* Room with one temperature state, heated by the input u.
+ *
+ * Minimal FMI 2.0 co-simulation FMU that can get, set and serialize its
+ * state, used to test the state handling of EnvFMU. The state is the whole
+ * model struct, so that it is serialized by a plain copy.
+ */
+#include <stdlib.h>
+#include <string.h>
+
+#include "fmi2Functions.h"
+
+typedef struct {
+    double time;
+    double temperature;
+    double u;
+    double k;
+} State;
+
+typedef struct {
+    State state;
+    const fmi2CallbackFunctions *functions;
+} Model;
+
+static double derivative(const State *s) {
+    return -s->k * (s->temperature - 280.0) + 0.01 * s->u;
+}
+
+static double get_value(const State *s, fmi2ValueReference vr) {
+    switch (vr) {
+        case 0: return s->temperature;
+        case 1: return s->u;
+        case 2: return s->k;
+        case 3: return derivative(s);
+        case 4: return 1000.0 * s->u;
+    }
+    return 0.0;
+}
+
+const char *fmi2GetTypesPlatform(void) { return fmi2TypesPlatform; }
+
+const char *fmi2GetVersion(void) { return fmi2Version; }
+
+fmi2Status fmi2SetDebugLogging(fmi2Component c, fmi2Boolean loggingOn,
+                               size_t n, const fmi2String categories[]) {
+    return fmi2OK;
+}
+
+fmi2Component fmi2Instantiate(fmi2String name, fmi2Type type, fmi2String guid,
+                              fmi2String resources,
+                              const fmi2CallbackFunctions *functions,
+                              fmi2Boolean visible, fmi2Boolean loggingOn) {
+    Model *m = calloc(1, sizeof(Model));
+    m->state.temperature = 293.0;
+    m->state.k = 1e-4;
+    m->functions = functions;
+    if (loggingOn && functions && functions->logger) {
+        functions->logger(functions->componentEnvironment, name, fmi2OK,
+                          "logAll", "instantiated %s", name);
+    }
+    return m;
+}
+
+void fmi2FreeInstance(fmi2Component c) { free(c); }
+
+fmi2Status fmi2SetupExperiment(fmi2Component c, fmi2Boolean toleranceDefined,
+                               fmi2Real tolerance, fmi2Real startTime,
+                               fmi2Boolean stopTimeDefined, fmi2Real stopTime) {
+    ((Model *)c)->state.time = startTime;
+    return fmi2OK;
+}
+
+fmi2Status fmi2EnterInitializationMode(fmi2Component c) { return fmi2OK; }
+
+fmi2Status fmi2ExitInitializationMode(fmi2Component c) { return fmi2OK; }
+
+fmi2Status fmi2Terminate(fmi2Component c) { return fmi2OK; }
+
+fmi2Status fmi2Reset(fmi2Component c) {
+    Model *m = c;
+    m->state.temperature = 293.0;
+    m->state.u = 0.0;
+    return fmi2OK;
+}
+
+fmi2Status fmi2GetReal(fmi2Component c, const fmi2ValueReference vr[],
+                       size_t n, fmi2Real value[]) {
+    for (size_t i = 0; i < n; i++) {
+        value[i] = get_value(&((Model *)c)->state, vr[i]);
+    }
+    return fmi2OK;
+}
+
+fmi2Status fmi2SetReal(fmi2Component c, const fmi2ValueReference vr[],
+                       size_t n, const fmi2Real value[]) {
+    State *s = &((Model *)c)->state;
+    for (size_t i = 0; i < n; i++) {
+        switch (vr[i]) {
+            case 0: s->temperature = value[i]; break;
+            case 1: s->u = value[i]; break;
+            case 2: s->k = value[i]; break;
+            default: return fmi2Error;
+        }
+    }
+    return fmi2OK;
+}
+
+fmi2Status fmi2GetInteger(fmi2Component c, const fmi2ValueReference vr[],
+                          size_t n, fmi2Integer value[]) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2GetBoolean(fmi2Component c, const fmi2ValueReference vr[],
+                          size_t n, fmi2Boolean value[]) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2GetString(fmi2Component c, const fmi2ValueReference vr[],
+                         size_t n, fmi2String value[]) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2SetInteger(fmi2Component c, const fmi2ValueReference vr[],
+                          size_t n, const fmi2Integer value[]) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2SetBoolean(fmi2Component c, const fmi2ValueReference vr[],
+                          size_t n, const fmi2Boolean value[]) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2SetString(fmi2Component c, const fmi2ValueReference vr[],
+                         size_t n, const fmi2String value[]) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2GetFMUstate(fmi2Component c, fmi2FMUstate *state) {
+    if (*state == NULL) {
+        *state = malloc(sizeof(State));
+    }
+    memcpy(*state, &((Model *)c)->state, sizeof(State));
+    return fmi2OK;
+}
+
+fmi2Status fmi2SetFMUstate(fmi2Component c, fmi2FMUstate state) {
+    memcpy(&((Model *)c)->state, state, sizeof(State));
+    return fmi2OK;
+}
+
+fmi2Status fmi2FreeFMUstate(fmi2Component c, fmi2FMUstate *state) {
+    free(*state);
+    *state = NULL;
+    return fmi2OK;
+}
+
+fmi2Status fmi2SerializedFMUstateSize(fmi2Component c, fmi2FMUstate state,
+                                      size_t *size) {
+    *size = sizeof(State);
+    return fmi2OK;
+}
+
+fmi2Status fmi2SerializeFMUstate(fmi2Component c, fmi2FMUstate state,
+                                 fmi2Byte bytes[], size_t size) {
+    memcpy(bytes, state, sizeof(State));
+    return fmi2OK;
+}
+
+fmi2Status fmi2DeSerializeFMUstate(fmi2Component c, const fmi2Byte bytes[],
+                                   size_t size, fmi2FMUstate *state) {
+    if (*state == NULL) {
+        *state = malloc(sizeof(State));
+    }
+    memcpy(*state, bytes, sizeof(State));
+    return fmi2OK;
+}
+
+fmi2Status fmi2GetDirectionalDerivative(fmi2Component c,
+                                        const fmi2ValueReference unknown[],
+                                        size_t nUnknown,
+                                        const fmi2ValueReference known[],
+                                        size_t nKnown, const fmi2Real dvKnown[],
+                                        fmi2Real dvUnknown[]) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2SetRealInputDerivatives(fmi2Component c,
+                                       const fmi2ValueReference vr[], size_t n,
+                                       const fmi2Integer order[],
+                                       const fmi2Real value[]) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2GetRealOutputDerivatives(fmi2Component c,
+                                        const fmi2ValueReference vr[], size_t n,
+                                        const fmi2Integer order[],
+                                        fmi2Real value[]) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2DoStep(fmi2Component c, fmi2Real currentCommunicationPoint,
+                      fmi2Real communicationStepSize,
+                      fmi2Boolean noSetFMUStatePriorToCurrentPoint) {
+    State *s = &((Model *)c)->state;
+    int n = 100;
+    double dt = communicationStepSize / n;
+    for (int i = 0; i < n; i++) {
+        s->temperature += dt * derivative(s);
+    }
+    s->time = currentCommunicationPoint + communicationStepSize;
+    return fmi2OK;
+}
+
+fmi2Status fmi2CancelStep(fmi2Component c) { return fmi2Error; }
+
+fmi2Status fmi2GetStatus(fmi2Component c, const fmi2StatusKind s,
+                         fmi2Status *value) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2GetRealStatus(fmi2Component c, const fmi2StatusKind s,
+                             fmi2Real *value) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2GetIntegerStatus(fmi2Component c, const fmi2StatusKind s,
+                                fmi2Integer *value) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2GetBooleanStatus(fmi2Component c, const fmi2StatusKind s,
+                                fmi2Boolean *value) {
+    return fmi2Error;
+}
+
+fmi2Status fmi2GetStringStatus(fmi2Component c, const fmi2StatusKind s,
+                               fmi2String *value) {
+    return fmi2Error;
+}
@@ -0,0 +1,291 @@
+import os
+import asyncio
+import datetime
+import platform
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+import energym
+from energym.envs.env import Wrapper
+from energym.envs.env_fmu import EnvFMU
+from energym.wrappers.filter_outputs import FilterOutputs
+from energym.envs.utils.fmu_cache import (
+    extract_cached,
+    create_instance_dir,
+    gc_fmu_cache,
+    load_model_info,
+)
+
+fmu_file = (
+    Path(energym.__file__).resolve().parent.parent
+    / "simulation"
+    / "modelica"
+    / "simple_house"
+    / "fmus"
+    / platform.system().lower()
+    / "HP_u_Rad_1RC_Sun.fmu"
+)
+
+
+def run_episode(env, n_steps, u=0.5):
+    return [env.step({"u": [u]})["temRoo.T"] for _ in range(n_steps)]
+
+
+def test_reset_restarts_simulation():
+    env = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    first = run_episode(env, 10)
+    env.reset()
+    assert env.time == env.start_time
+    assert env.kpis.num_obs == 0
+    second = run_episode(env, 10)
+    assert first == second
+    env.close()
+
+
+def test_reset_without_fast_reset():
+    env = energym.make("SimpleHouseRad-v0", simulation_days=1, fast_reset=False)
+    first = run_episode(env, 10)
+    env.reset()
+    second = run_episode(env, 10)
+    assert first == second
+    env.close()
+
+
+def test_step_array_matches_step():
+    env_dict = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    env_array = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    u = np.array([0.5 if key == "u" else 0.0 for key in env_array.input_keys])
+    index = env_array.get_outputs_names().index("temRoo.T")
+    for _ in range(10):
+        expected = env_dict.step({"u": [0.5]})["temRoo.T"]
+        assert env_array.step_array(u)[index] == expected
+    assert env_array.kpis.num_obs == env_dict.kpis.num_obs
+    assert env_array.get_kpi() == env_dict.get_kpi()
+    env_dict.close()
+    env_array.close()
+
+
+def test_rollout_matches_step_array():
+    env_step = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    env_rollout = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    inputs = np.linspace(0, 1, 10)[:, None] * np.ones(len(env_step.input_keys))
+    expected = np.array([env_step.step_array(u).copy() for u in inputs])
+    outputs, times = env_rollout.rollout(inputs)
+    assert np.array_equal(outputs, expected)
+    assert times[-1] == env_step.time == env_rollout.time
+    assert env_rollout.kpis.num_obs == 10
+    assert env_rollout.get_kpi() == env_step.get_kpi()
+    env_step.close()
+    env_rollout.close()
+
+
+def test_instances_from_threads():
+    def run(_):
+        env = energym.make("SimpleHouseRad-v0", simulation_days=1)
+        result = run_episode(env, 10)
+        instance_id, unzipdir = env.instance_id, env.unzipdir
+        env.close()
+        assert not os.path.exists(unzipdir)
+        return instance_id, result
+
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(run, range(8)))
+    assert len({instance_id for instance_id, _ in results}) == 8
+    assert all(result == results[0][1] for _, result in results)
+
+
+class RoomTemperature(Wrapper):
+    def step(self, inputs):
+        return {"temRoo.T": self.env.step(inputs)["temRoo.T"]}
+
+
+def test_astep_gather():
+    envs = [energym.make("SimpleHouseRad-v0", simulation_days=1) for _ in range(3)]
+    envs[2] = RoomTemperature(envs[2])
+
+    async def run(env):
+        results = [(await env.astep({"u": [0.5]}))["temRoo.T"] for _ in range(5)]
+        await env.areset()
+        return results
+
+    async def main():
+        return await asyncio.gather(*[run(env) for env in envs])
+
+    results = asyncio.run(main())
+    assert results == [run_episode(envs[0], 5)] * 3
+    assert list(envs[2].step({"u": [0.5]}).keys()) == ["temRoo.T"]
+    for env in envs:
+        env.close()
+
+
+def test_model_exchange_matches_co_simulation():
+    env_cs = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    env_me = energym.make("SimpleHouseRad-v0", simulation_days=1, solver="cvode")
+    assert env_me.fmi_type == "modex"
+    expected = run_episode(env_cs, 20)
+    result = run_episode(env_me, 20)
+    assert np.allclose(result, expected, rtol=1e-4)
+    env_me.reset()
+    assert run_episode(env_me, 20) == result
+    env_cs.close()
+    env_me.close()
+    # make() logs the ValueError and returns None
+    assert energym.make("SimpleHouseRad-v0", solver="rk45") is None
+
+
+def test_step_array_batch_matches_step_array():
+    kwargs = dict(simulation_days=1, solver="rk4", max_solver_step=2.0)
+    envs = [energym.make("SimpleHouseRad-v0", **kwargs) for _ in range(3)]
+    inputs = np.zeros((3, len(envs[0].input_keys)))
+    inputs[:, envs[0].input_keys.index("u")] = [0.0, 0.5, 1.0]
+    for _ in range(5):
+        outputs = EnvFMU.step_array_batch(envs[:2], inputs[:2])
+        expected = envs[2].step_array(inputs[1])
+        assert np.allclose(outputs[1], expected)
+        assert not np.allclose(outputs[0], expected)
+    for env in envs:
+        env.close()
+
+
+def test_hold_steps():
+    env = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    env_hold = energym.make("SimpleHouseRad-v0", simulation_days=1, hold_steps=4)
+    env_dense = energym.make(
+        "SimpleHouseRad-v0", simulation_days=1, hold_steps=4, dense_output=True
+    )
+    expected = run_episode(env, 8)
+    held = run_episode(env_hold, 2)
+    assert run_episode(env_dense, 2) == expected[3::4]
+    index = env_dense.get_outputs_names().index("temRoo.T")
+    assert env_dense.dense_outputs[:, index].tolist() == expected[4:]
+    assert np.allclose(held, expected[3::4], rtol=1e-4)
+    assert env_hold.time == env.time
+    assert env_hold.kpis.num_obs == env_dense.kpis.num_obs == env.kpis.num_obs
+    assert env_dense.get_kpi() == env.get_kpi()
+    for e in [env, env_hold, env_dense]:
+        e.close()
+
+
+def test_calendar_matches_utc_dates():
+    env = energym.make(
+        "SimpleHouseRad-v0", start_day=27, start_month=2, simulation_days=3
+    )
+    assert len(env.calendar["hour"]) == 3 * 24 * 60 * 60 // env.step_size + 1
+    for _ in range(3 * 24 * 4):
+        date = datetime.datetime(2019, 1, 1) + datetime.timedelta(seconds=env.time)
+        assert env.get_date() == (date.minute, date.hour, date.day, date.month)
+        assert env.get_datetime() == date
+        step = env._calendar_step()
+        assert env.calendar["weekday"][step] == date.weekday()
+        env.step()
+    env.close()
+
+
+def test_history():
+    env = energym.make("SimpleHouseRad-v0", simulation_days=1, history_window=4)
+    expected = run_episode(env, 6)
+    history = env.get_history()
+    assert history["temRoo.T"].tolist() == expected[-4:]
+    assert history["time"][-1] == env.time
+    assert env.get_history("temRoo.T", last_n=2).tolist() == expected[-2:]
+    assert np.shares_memory(history, env._history)
+    env.reset()
+    assert len(env.get_history()) == 0
+    env.close()
+
+
+def test_history_covering_episode(make_room):
+    env = make_room(stop_time=1500)
+    window = len(env._calendar_dates)
+    assert env._history.shape[0] == window
+    expected = [env.step({"u": [0.5]})["T"] for _ in range(window + 2)]
+    history = env.get_history("T")
+    assert history.tolist() == expected[-window:]
+    assert np.shares_memory(history, env._history)
+    assert env.get_history("T", last_n=2).tolist() == expected[-2:]
+    env.close()
+
+
+def test_filter_outputs_selects_outputs():
+    env = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    expected = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    wrapped = FilterOutputs(env, ["TOut.T", "temRoo.T"])
+    # heaPum.P is kept for the KPIs
+    assert env.get_outputs_names() == ["TOut.T", "heaPum.P", "temRoo.T"]
+    for _ in range(4):
+        outputs = wrapped.step({"u": [0.5]})
+        assert list(outputs) == ["TOut.T", "temRoo.T"]
+        assert outputs["temRoo.T"] == expected.step({"u": [0.5]})["temRoo.T"]
+    assert env.get_kpi() == expected.get_kpi()
+    env.select_outputs()
+    assert env.get_outputs_names() == expected.get_outputs_names()
+    with pytest.raises(ValueError):
+        env.select_outputs(["unknown"])
+    env.close()
+    expected.close()
+
+
+def test_log_level():
+    env = energym.make("SimpleHouseRad-v0", simulation_days=1, log_level="full")
+    quiet = energym.make("SimpleHouseRad-v0", simulation_days=1, log_level="off")
+    assert run_episode(env, 2) == run_episode(quiet, 2)
+    assert len(env.fmu_log) > 0
+    assert len(quiet.fmu_log) == 0
+    env.close()
+    quiet.close()
+    # make() logs the ValueError and returns None
+    assert energym.make("SimpleHouseRad-v0", log_level="verbose") is None
+
+
+def test_clone_and_checkpoint_require_serializable_state(tmp_path):
+    env = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    assert not env.supports_fmu_serialization()
+    with pytest.raises(Exception, match="cannot be cloned"):
+        env.clone()
+    with pytest.raises(Exception, match="no checkpoint"):
+        env.set_checkpoints(str(tmp_path / "checkpoint.pkl"), 10)
+    with pytest.raises(Exception, match="cannot resume"):
+        env.resume(str(tmp_path / "checkpoint.pkl"))
+    env.close()
+
+
+def test_forecast_members():
+    env = energym.make(
+        "SimpleHouseRad-v0",
+        simulation_days=1,
+        generate_forecast_method="stochastic",
+        generate_forecast_seed=0,
+    )
+    run_episode(env, 7)
+    forecast = env.get_forecast(30)
+    members = env.get_forecast(30, n_members=4)
+    for key in forecast:
+        assert forecast[key].shape == (30,)
+        assert members[key].shape == (4, 30)
+    assert not np.array_equal(members["TOut.T"][0], members["TOut.T"][1])
+    env.close()
+
+
+def test_fmu_cache_shares_extraction(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    shared = extract_cached(fmu_file, cache_dir)
+    assert extract_cached(fmu_file, cache_dir) == shared
+    instance = create_instance_dir(shared, str(tmp_path / "instance"))
+    assert os.path.isfile(os.path.join(instance, "modelDescription.xml"))
+    assert os.path.isdir(os.path.join(instance, "resources"))
+    os.utime(shared, (0, 0))
+    assert gc_fmu_cache(cache_dir) == [shared]
+    assert os.listdir(cache_dir) == []
+
+
+def test_model_info_cache(tmp_path):
+    cache_dir = str(tmp_path / "models")
+    info = load_model_info(fmu_file, cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+    assert load_model_info(fmu_file, cache_dir) == info
+    assert info["fmi_type"] == "cosim"
+    assert "u" in info["inputs"]
+    assert info["outputs"] == sorted(info["outputs"])
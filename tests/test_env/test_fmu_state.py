@@ -0,0 +1,139 @@
+import numpy as np
+
+from energym.envs.env_fmu_eplus import EnvEPlusFMU
+from energym.envs.utils.state_library import state_library_dir
+
+
+def run_episode(env, n_steps, u=0.5):
+    return [env.step({"u": [u]})["T"] for _ in range(n_steps)]
+
+
+def test_fast_reset_restores_fmu_state(make_room):
+    env = make_room()
+    slow = make_room(fast_reset=False)
+    assert env.supports_fmu_state()
+    first = run_episode(env, 5)
+    assert env._reset_state is not None
+    assert run_episode(slow, 5) == first
+    env.reset()
+    slow.reset()
+    assert env.time == env.start_time
+    assert run_episode(env, 5) == first
+    assert run_episode(slow, 5) == first
+    assert env.get_kpi() == slow.get_kpi()
+    env.close()
+    slow.close()
+
+
+def test_eplus_fast_reset_observes_first_step(make_room_eplus):
+    env = make_room_eplus()
+    slow = make_room_eplus(fast_reset=False)
+    for e in [env, slow]:
+        run_episode(e, 4, u=1.0)
+        e.reset()
+    assert env._reset_state is not None and slow._reset_state is None
+    assert env.time == slow.time == env.start_time + env.step_size
+    assert env.get_output() == slow.get_output()
+    assert env.get_kpi() == slow.get_kpi()
+    np.testing.assert_array_equal(env.get_history(), slow.get_history())
+    assert len(env.get_history()) == 1
+    assert run_episode(env, 3) == run_episode(slow, 3)
+    env.close()
+    slow.close()
+
+
+def test_fork_matches_continued_run(make_room):
+    env = make_room()
+    run_episode(env, 5)
+    clones = env.fork(2)
+    expected = run_episode(env, 5)
+    for clone in clones:
+        assert clone.time == env.start_time + 5 * env.step_size
+        assert run_episode(clone, 5) == expected
+        assert clone.get_kpi() == env.get_kpi()
+        np.testing.assert_array_equal(clone.get_history(), env.get_history())
+        clone.release()
+    # released instances are reused by the next fork
+    clone = env.clone()
+    assert clone in clones
+    clone.reset()
+    env.reset()
+    assert run_episode(clone, 3) == run_episode(env, 3)
+    env.close()
+
+
+def test_fork_eplus_skips_warm_up(make_room_eplus, monkeypatch):
+    env = make_room_eplus()
+    run_episode(env, 3, u=1.0)
+    steps = []
+    monkeypatch.setattr(EnvEPlusFMU, "step_array", lambda *args: steps.append(args))
+    monkeypatch.setattr(EnvEPlusFMU, "step", lambda *args: steps.append(args))
+    clone = env.clone()
+    monkeypatch.undo()
+    assert steps == []
+    assert clone.get_output() == env.get_output()
+    assert run_episode(clone, 3) == run_episode(env, 3)
+    clone.reset()
+    env.reset()
+    assert clone.get_output() == env.get_output()
+    assert clone.get_kpi() == env.get_kpi()
+    assert run_episode(clone, 3) == run_episode(env, 3)
+    clone.close()
+    env.close()
+
+
+def test_resume_matches_uninterrupted_run(make_room, tmp_path):
+    path = str(tmp_path / "checkpoint.pkl")
+    env = make_room()
+    env.set_checkpoints(path, 4)
+    run_episode(env, 6)
+    # the copies of an environment do not write its checkpoints
+    clone = env.clone()
+    run_episode(clone, 10)
+    clone.close()
+    resumed = make_room()
+    resumed.resume(path)
+    assert resumed.time == env.start_time + 4 * env.step_size
+    run_episode(resumed, 2)
+    expected = run_episode(env, 4)
+    kpis = env.get_kpi()
+    assert run_episode(resumed, 4) == expected
+    assert resumed.get_kpi() == kpis
+    resumed.reset()
+    env.reset()
+    assert run_episode(resumed, 3) == run_episode(env, 3)
+    env.close()
+    resumed.close()
+
+
+def test_library_start_matches_full_run(make_room_eplus, monkeypatch, tmp_path):
+    # the state library is kept in the runs folder of the home directory
+    monkeypatch.setenv("HOME", str(tmp_path))
+    writer = make_room_eplus(stop_time=2 * 86400)
+    assert len(writer.write_state_library()) == 2
+    writer.close()
+    full = make_room_eplus(stop_time=2 * 86400)
+    start_time = 86400 + 900
+    while full.time < start_time + full.step_size:
+        full.step({})
+    # a library start continues the run from January 1, which is what it
+    # is compared to, not a warm-up at the start date
+    env = make_room_eplus(start_time=start_time, stop_time=2 * 86400)
+    assert env.time == full.time
+    assert env.get_output() == full.get_output()
+    history = env.get_history()
+    assert history["time"].tolist() == [env.time]
+    assert env.kpis.num_obs == 1
+    assert run_episode(env, 5) == run_episode(full, 5)
+    env.close()
+    full.close()
+
+
+def test_state_library_keyed_by_weather_content(tmp_path):
+    files = [tmp_path / name / "weather.epw" for name in ["a", "b", "c"]]
+    for path, content in zip(files, ["1", "2", "1"]):
+        path.parent.mkdir()
+        path.write_text(content)
+    directories = [state_library_dir(str(tmp_path), "{guid}", f) for f in files]
+    assert directories[0] != directories[1]
+    assert directories[0] == directories[2]
@@ -0,0 +1,38 @@
+import numpy as np
+
+import energym
+from energym.envs.vector_env import VectorEnv
+from energym.spaces.box import Box
+from energym.spaces.dict import Dict
+
+
+def test_vector_env_matches_single_env():
+    venv = VectorEnv("SimpleHouseRad-v0", 2, seed=0, simulation_days=1)
+    env = energym.make("SimpleHouseRad-v0", simulation_days=1)
+    assert venv.get_outputs_names() == env.get_outputs_names()
+    actions = np.full((2, len(venv.input_keys)), 0.5)
+    n_steps = int((env.stop_time - env.start_time) / env.step_size)
+    for i in range(n_steps):
+        if i == n_steps - 1:
+            assert venv.get_kpi() == [env.get_kpi()] * 2
+        observations, times, dones = venv.step(actions)
+        expected = env.step_array(actions[0])
+        assert np.array_equal(observations[0], expected)
+        assert np.array_equal(observations[1], expected)
+    # the environments are reset automatically at the stop time
+    assert dones.all()
+    venv.step(actions)
+    assert (venv.times == env.start_time + env.step_size).all()
+    assert not venv.dones.any()
+    assert len(venv.get_forecast(4)) == 2
+    venv.close()
+    env.close()
+
+
+def test_dict_space_seeding():
+    space = Dict({"a": Box(0, 1, shape=(1,)), "b": Box(0, 1, shape=(1,))})
+    space.seed(3)
+    first = space.sample()
+    assert first["a"] != first["b"]
+    space.seed(3)
+    assert space.sample() == first
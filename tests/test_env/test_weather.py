@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from energym.envs.utils.weather import EPW, MOS
+
+energym_path = Path(__file__).resolve().parent.parent.parent
+epw_file = energym_path / "simulation/energyplus/offices/wf/GRC_Athens.167160_IWEC.epw"
+mos_file = energym_path / "simulation/modelica/simple_house/wf/Basel_Fixed.mos"
+
+
+def test_weather_cache(tmp_path):
+    for weather_class, path in [(EPW, epw_file), (MOS, mos_file)]:
+        parsed = weather_class(cache_dir=None)
+        parsed.read(path)
+        for _ in range(2):
+            cached = weather_class(cache_dir=str(tmp_path))
+            cached.read(path)
+            assert cached.headers == parsed.headers
+            pd.testing.assert_frame_equal(cached.dataframe, parsed.dataframe)
+    assert len(list(tmp_path.glob("*.npz"))) == 2
+    # a truncated cache file is parsed again and rewritten
+    cache_file = next(tmp_path.glob("Basel_Fixed_*.npz"))
+    cache_file.write_bytes(cache_file.read_bytes()[:100])
+    cached = MOS(cache_dir=str(tmp_path))
+    cached.read(mos_file)
+    pd.testing.assert_frame_equal(cached.dataframe, parsed.dataframe)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_epw_forecast_wraps_around_year_end():
+    weather = EPW(cache_dir=None)
+    weather.read(epw_file)
+    temperatures = weather.dataframe["Dry Bulb Temperature"].tolist()
+    forecast = weather.get_forecast(23, 31, 12, 3)["Ext_T"]
+    assert forecast.tolist() == temperatures[-2:] + temperatures[:1]
+    forecast = weather.get_forecast(0, 1, 1, 3)["Ext_T"]
+    assert forecast.tolist() == temperatures[-1:] + temperatures[:2]
+    forecast = weather.get_forecast(5, 3, 4, 24)["Ext_T"]
+    assert np.shares_memory(forecast, weather.get_forecast(6, 3, 4, 24)["Ext_T"])
+
+
+def test_mos_forecast_uses_closest_time():
+    weather = MOS(cache_dir=None)
+    weather.read(mos_file)
+    temperatures = weather.dataframe["Dry Bulb Temperature"].to_numpy() + 273.15
+    forecast = weather.get_forecast(7200, 3)["TOut.T"]
+    np.testing.assert_array_equal(forecast, temperatures[2:5])
+    np.testing.assert_array_equal(weather.get_forecast(7000, 3)["TOut.T"], forecast)
+    forecast = weather.get_forecast(weather.dataframe["Time"].iloc[-2], 24)["TOut.T"]
+    np.testing.assert_array_equal(forecast, temperatures[-2:])
+
+
+def test_stochastic_forecast_is_seeded():
+    forecasts = []
+    for seed in [0, 0, 1]:
+        weather = EPW(cache_dir=None)
+        weather.read(epw_file, generate_forecast_method="stochastic", generate_forecast_seed=seed)
+        forecasts.append(weather.get_forecast(1, 1, 1, 8760)["Ext_T"])
+    np.testing.assert_array_equal(forecasts[0], forecasts[1])
+    assert not np.array_equal(forecasts[0], forecasts[2])
+    temperatures = weather.dataframe["Dry Bulb Temperature"].to_numpy()
+    rates = forecasts[0][temperatures != 0] / temperatures[temperatures != 0]
+    assert rates.min() >= 0.8 and rates.max() <= 1.2
+
+
+def test_forecast_members():
+    weather = MOS(cache_dir=None)
+    weather.read(mos_file, generate_forecast_method="stochastic", generate_forecast_seed=0)
+    members = weather.get_forecast(7200, 24, n_members=3)["TOut.T"]
+    assert members.shape == (3, 24)
+    assert not np.array_equal(members[0], members[1])
+    more = weather.get_forecast(7200, 24, n_members=5)["TOut.T"]
+    np.testing.assert_array_equal(more[:3], members)
+    eager = MOS(cache_dir=None)
+    eager.read(
+        mos_file,
+        generate_forecast_method="stochastic",
+        generate_forecast_seed=0,
+        n_members=5,
+    )
+    assert eager._members.shape == (2, 5, len(eager.dataframe))
+    weather = EPW(cache_dir=None)
+    weather.read(epw_file)
+    members = weather.get_forecast(23, 31, 12, 3, n_members=2)["Ext_T"]
+    np.testing.assert_array_equal(members, [weather.get_forecast(23, 31, 12, 3)["Ext_T"]] * 2)
@@ -0,0 +1,57 @@
+import os
+
+import numpy as np
+import pytest
+
+import energym
+from energym.server import SimulationServer, RemoteEnv
+
+
+def test_remote_env(tmp_path):
+    address = str(tmp_path / "energym.sock")
+    server = SimulationServer(address, n_workers=1)
+    server.start()
+    try:
+        local = energym.make("SimpleHouseRad-v0", simulation_days=1)
+        remotes = [
+            RemoteEnv(address, "SimpleHouseRad-v0", simulation_days=1) for _ in range(2)
+        ]
+        assert remotes[0].get_inputs_names() == local.get_inputs_names()
+        for _ in range(3):
+            expected = local.step({"u": [0.5]})
+            for remote in remotes:
+                assert remote.step({"u": [0.5]}) == expected
+        assert remotes[0].get_kpi() == local.get_kpi()
+        forecast = local.get_forecast(4)
+        for key, values in remotes[1].get_forecast(4).items():
+            assert values.tolist() == forecast[key].tolist()
+        remotes[1].reset()
+        assert remotes[1].time == local.start_time
+        remotes[1].step({"u": [0.5]})
+        with pytest.raises(ValueError):
+            remotes[0].step({"unknown": [0.0]})
+        with pytest.raises(ValueError):
+            remotes[0].step({"u": [0.5, 0.5]})
+        # NaN is an input value, not the marker of a default input
+        with pytest.raises(ValueError, match="NaN"):
+            remotes[0].step({"u": [np.nan]})
+        with pytest.raises(ValueError, match="NaN"):
+            remotes[0].step_array(np.full(len(remotes[0].input_keys), np.nan))
+
+        # a crashed worker is restarted with its environments, and every
+        # client of the worker is told at its next request
+        os.kill(server._simulators[0].process.pid, 9)
+        with pytest.raises(Exception, match="crashed"):
+            remotes[0].step({"u": [0.5]})
+        with pytest.raises(Exception, match="crashed"):
+            remotes[1].get_date()
+        for remote in remotes:
+            assert remote.time == local.start_time
+            output = remote.step({})
+            assert remote.time == local.start_time + local.step_size
+            assert len(output) == len(local.get_outputs_names()) + 1
+        for remote in remotes:
+            remote.close()
+        local.close()
+    finally:
+        server.shutdown()
@@ -0,0 +1,47 @@
+import os
+import datetime
+
+import pytest
+
+from energym.sweep import sweep, make_grid, run_scenario
+
+
+class ConstantPolicy(object):
+    def __init__(self, u):
+        self.u = u
+
+    def __call__(self, env):
+        return lambda outputs, env: {"u": [self.u]}
+
+
+def test_sweep_grid(tmp_path):
+    path = str(tmp_path / "results.csv")
+    results = sweep(
+        ["SimpleHouseRad-v0"],
+        start_dates=[datetime.date(2019, 1, 1), datetime.date(2019, 2, 1)],
+        controllers={"off": None, "on": ConstantPolicy(1.0)},
+        n_workers=2,
+        path=path,
+    )
+    assert list(results["status"]) == ["ok"] * 4
+    assert list(results["controller"]) == ["off", "on", "off", "on"]
+    power = results["heaPum.P:avg"]
+    assert (power[results["controller"] == "on"] > 0).all()
+    assert (power[results["controller"] == "off"] == 0).all()
+    assert len(open(path).readlines()) == 5
+    assert not os.path.exists(path + ".parts")
+
+
+def test_sweep_timeout():
+    results = sweep(["SimpleHouseRad-v0"], n_workers=1, retries=1, timeout=0.01)
+    assert results["status"][0] == "timeout"
+    assert results["attempts"][0] == 2
+
+
+def test_sweep_rejects_start_date_outside_calendar_year():
+    with pytest.raises(ValueError, match="not in 2019"):
+        sweep(["SimpleHouseRad-v0"], start_dates=[datetime.date(2020, 3, 1)])
+    scenario = make_grid(["SimpleHouseRad-v0"])[0]
+    scenario["start_date"] = datetime.date(2020, 3, 1)
+    with pytest.raises(ValueError, match="not in 2019"):
+        run_scenario(scenario)